@@ -1,9 +1,13 @@
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import ORJSONResponse, HTMLResponse
 from fastapi import APIRouter, Request, HTTPException
 from fastapi.templating import Jinja2Templates
 import logging
+import time
 
 from app.core.time_manager import TimeManager
+from app.core import worker as worker_module
+from app.core.worker import add_job, JobType, job_queue
+from app.core.stream_metrics import stream_health_monitor, StreamHealthMonitor
 from app.obs import obs_socket_manager_instance
 
 logger = logging.getLogger(__name__)
@@ -21,7 +25,7 @@ async def queue_json():
         return_content = {
              "song_data": song_data,
         }
-        return JSONResponse(content=return_content)
+        return ORJSONResponse(content=return_content)
 
 
 @http_blueprint.get("/song-details",response_class=HTMLResponse)
@@ -35,7 +39,7 @@ async def queue_json():
         return_content = {
              "stream_queue": stream_queue,
         }
-        return JSONResponse(content=return_content)
+        return ORJSONResponse(content=return_content)
 
 
 @http_blueprint.get("/queue-list",response_class=HTMLResponse)
@@ -52,7 +56,7 @@ async def queue_list():
         return_content = {
                 "remaining_time": remaining_time
         }
-        return JSONResponse(content=return_content)
+        return ORJSONResponse(content=return_content)
 
 
 @http_blueprint.get("/timer-page",response_class=HTMLResponse)
@@ -86,7 +90,7 @@ async def timer_get():
         else:
             swap_interval = TimeManager().get_swap_interval()
             remaining_time = 0
-        return JSONResponse(content={"swap_interval": swap_interval,"remaining_time": remaining_time})
+        return ORJSONResponse(content={"swap_interval": swap_interval,"remaining_time": remaining_time})
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -108,9 +112,8 @@ async def get_toggle():
     Return the current setting for temporary lead-blocking.
     """
     try:
-        is_blocked = process_manager.get_is_blocking_last_streamer()
-        last_stream = process_manager.get_last_stream_key()
-        return JSONResponse(content={"is_blocked": is_blocked, "last_stream_key": last_stream})
+        last_stream, is_blocked = process_manager.get_block_state()
+        return ORJSONResponse(content={"is_blocked": is_blocked, "last_stream_key": last_stream})
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -223,8 +226,6 @@ async def get_job_queue_status():
     Get the current status of the job queue for debugging.
     """
     try:
-        from app.core.worker import job_queue
-        
         return {
             "status": "success",
             "queue_size": job_queue.qsize(),
@@ -243,8 +244,6 @@ async def test_job_toggle(
     Test the job queue system by manually adding a toggle job.
     """
     try:
-        from app.core.worker import add_job, JobType
-        
         add_job(JobType.TOGGLE_OBS_SRC, payload={
             "source_name": source_name,
             "scene_name": scene_name,
@@ -269,8 +268,6 @@ async def simulate_stream_switch():
     Simulate the OBS operations that happen during a stream switch for debugging.
     """
     try:
-        from app.core.worker import add_job, JobType
-        
         # Simulate the sequence of jobs that happen during stream switching
         jobs_added = []
         
@@ -305,8 +302,6 @@ async def test_dynamic_source_switch(
     This creates a fresh source with the specified RTMP URL.
     """
     try:
-        from app.core.worker import add_job, JobType
-        
         logger.info(f"Testing dynamic source switch with URL: {rtmp_url}")
         
         add_job(JobType.SWITCH_GSTREAMER_SOURCE, payload={
@@ -374,9 +369,6 @@ async def get_current_stream_health():
     to detect frozen frames caused by sources becoming visible before ready.
     """
     try:
-        from app.core.stream_metrics import stream_health_monitor
-        from app.obs import obs_socket_manager_instance
-        
         health = stream_health_monitor.get_current_health()
         
         # Get current GStreamer source info
@@ -461,8 +453,6 @@ async def get_stream_health_history(count: int = 20):
     :param count: Number of recent snapshots to return (default: 20, max: 100)
     """
     try:
-        from app.core.stream_metrics import stream_health_monitor
-        
         count = min(count, 100)  # Cap at 100
         history = stream_health_monitor.get_health_history(count)
         
@@ -484,8 +474,6 @@ async def configure_stream_health_monitoring(poll_interval: float = 1.0):
     :param poll_interval: How often to collect metrics in seconds (0.1-10.0)
     """
     try:
-        from app.core.stream_metrics import stream_health_monitor
-        
         if poll_interval < 0.1 or poll_interval > 10.0:
             raise HTTPException(status_code=400, detail="poll_interval must be between 0.1 and 10.0 seconds")
         
@@ -509,8 +497,6 @@ async def stop_stream_health_monitoring():
     Generates a summary report automatically.
     """
     try:
-        from app.core.stream_metrics import stream_health_monitor
-        
         if not stream_health_monitor.monitoring_active:
             return {
                 "status": "not_active",
@@ -518,7 +504,6 @@ async def stop_stream_health_monitoring():
             }
         
         current_source = stream_health_monitor.current_source
-        from app.core.stream_metrics import StreamHealthMonitor
         csv_file = StreamHealthMonitor._shared_csv_file
         
         stream_health_monitor.stop_monitoring()
@@ -538,8 +523,6 @@ async def get_stream_health_monitoring_status():
     Get the status of stream health monitoring system.
     """
     try:
-        from app.core.stream_metrics import stream_health_monitor, StreamHealthMonitor
-        
         return {
             "status": "success",
             "monitoring_active": stream_health_monitor.monitoring_active,
@@ -598,8 +581,9 @@ async def get_obs_job_delay_config():
     Get the current OBS job delay configuration.
     """
     try:
-        from app.core.worker import OBS_JOB_DELAY, last_obs_job_time
-        import time
+        # Read through the module, these globals are reassigned at runtime
+        OBS_JOB_DELAY = worker_module.OBS_JOB_DELAY
+        last_obs_job_time = worker_module.last_obs_job_time
         
         current_time = time.time()
         time_since_last_job = current_time - last_obs_job_time if last_obs_job_time > 0 else None
@@ -624,8 +608,6 @@ async def update_obs_job_delay(delay_seconds: float):
         if delay_seconds < 0.5 or delay_seconds > 10.0:
             raise HTTPException(status_code=400, detail="Delay must be between 0.5 and 10.0 seconds")
         
-        # Import and update the global variable
-        import app.core.worker as worker_module
         worker_module.OBS_JOB_DELAY = delay_seconds
         
         return {
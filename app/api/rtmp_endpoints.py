@@ -1,12 +1,18 @@
-from fastapi.responses import JSONResponse
-from fastapi import Form, APIRouter, Body
+from fastapi.responses import ORJSONResponse, Response
+from fastapi import APIRouter, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ConfigDict, ValidationError
+import orjson
 
 from main import process_manager
-from ..lock_manager import lock as queue_lock
-from ..db.validation import ensure_valid_user
+from ..db.validation import ensure_valid_user, invalidate as invalidate_cached_user
 
+import asyncio
 import logging
 import os
+import sys
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
@@ -20,139 +26,180 @@ RTMP_PORT = os.getenv("RTMP_PORT", "1935")
 RTMP_RECORD_HOST = os.getenv("RTMP_RECORD_HOST", "127.0.0.1")
 RTMP_RECORD_PORT = os.getenv("RTMP_RECORD_PORT", "1936")
 
-rtmp_blueprint = APIRouter()
+# Env vars don't change at runtime, so resolve everything the callbacks need once at import
+RECORD_STREAM_ENABLED = bool(os.getenv('RECORD_STREAM'))
+RECORD_URL_TMPL = f"rtmp://{RTMP_RECORD_HOST}:{RTMP_RECORD_PORT}/live/{{stream}}" #nginx record path
+
+# Static callback payloads, serialized once. Response objects are still created per request: FastAPI
+# attaches per-request background tasks to whatever response instance a route returns, and CORSMiddleware
+# appends to the response's raw_headers list in place, so a shared instance would accumulate headers.
+DO_NOT_FORWARD_BODY = orjson.dumps({"code": 0, "data": {"urls": []}})
+INVALID_STREAM_KEY_BODY = orjson.dumps({"message": "Invalid stream key. you do not have permission to join the queue."})
+RECONNECT_TOO_SOON_BODY = orjson.dumps({"message": "Please wait before reconnecting.", "code": 0})
+PUBLISHING_ALLOWED_BODY = orjson.dumps({"message": "Publishing allowed", "code": 0})
+
+def do_not_forward_response():
+    return Response(content=DO_NOT_FORWARD_BODY, media_type="application/json")
+
+# Stream keys repeat across every callback of a session, so serialize each forward payload once
+@lru_cache(maxsize=1024)
+def forward_payload(stream) -> bytes:
+    urls = []
+    if RECORD_STREAM_ENABLED:
+        urls.append(RECORD_URL_TMPL.format(stream=stream))
+    return orjson.dumps({"code": 0, "data": {"urls": urls}})
+
+def forward_response(stream):
+    return Response(content=forward_payload(stream), media_type="application/json")
+
+# start_stream/switch_stream talk to SRS and enqueue OBS jobs. Run them after the response is sent, on a
+# single worker so they execute one at a time in the order the callbacks arrived.
+stream_control_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="StreamControl")
+
+def _log_stream_control_error(future):
+    if not future.cancelled() and future.exception():
+        logger.error("Stream control call failed", exc_info=future.exception())
+
+def submit_stream_control(func, *args):
+    future = stream_control_executor.submit(func, *args)
+    future.add_done_callback(_log_stream_control_error)
+    return future
+
+rtmp_blueprint = APIRouter(default_response_class=ORJSONResponse)
+
+
+class RtmpHook(BaseModel):
+    """Body of an SRS HTTP callback. Parsed straight from the raw bytes by pydantic-core."""
+    request_id: str | None = None
+    action: str | None = None
+    opaque: str | None = None
+    vhost: str | None = None
+    app: str | None = None
+    stream: str | None = None
+    addr: str | None = None
+    param: str | None = None
+
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
+
+async def _handle_on_unpublish(stream, param):
+    if not stream:
+        logger.warning("on_unpublish called without stream key")
+        return do_not_forward_response()
+
+    # Drop the cached lookup so the next on_publish re-checks the key against the DB, e.g. after it was revoked
+    invalidate_cached_user(stream)
+
+    pm = process_manager
+    sq = pm.stream_queue
+
+    # One lock acquisition for the check and the removal; the queue file is written after it's released.
+    # Queue mutations can wait on queue_lock and write QUEUE.json, so keep them off the event loop.
+    loop = asyncio.get_running_loop()
+    if not await loop.run_in_executor(None, sq.remove_client_unless_lead, stream):
+        logger.info("Removed non-lead streamer %s from queue", stream)
+        return do_not_forward_response()
+
+    logger.info("Lead streamer %s disconnected. Switching to next in queue.", stream)
+
+    submit_stream_control(pm.switch_stream)
+    return do_not_forward_response()
+
+
+async def _handle_on_forward(stream, param):
+    # Highest-frequency callback: no lock, no DB, just compare against the current queue head
+    if stream and process_manager.stream_queue.is_lead(stream):
+        return forward_response(stream)
+    return do_not_forward_response()
+
+
+async def _handle_on_publish(stream, param):
+    pm = process_manager
+    sq = pm.stream_queue
+    loop = asyncio.get_running_loop()
+
+    # Validate user first (no lock needed for this). This is a synchronous DB lookup, so run it in the executor.
+    user = await loop.run_in_executor(None, ensure_valid_user, stream)
+    if not user:
+        return Response(content=INVALID_STREAM_KEY_BODY, status_code=401, media_type="application/json")
+
+    # Blocking only matters when the queue is empty; try_claim_lead applies it atomically.
+    # Like the lookup above it can block (queue_lock, QUEUE.json write), so it runs in the executor too.
+    was_added, lead_stream_key = await loop.run_in_executor(
+        None, sq.try_claim_lead, user, not pm.should_block_streamer(stream))
+
+    if lead_stream_key is None:
+        logger.info("Blocking %s from immediately reclaiming lead slot", stream)
+        return Response(content=RECONNECT_TOO_SOON_BODY, status_code=401, media_type="application/json")
+
+    if lead_stream_key != stream:
+        if was_added:
+            logger.info("Stream %s joined queue behind lead %s", stream, lead_stream_key)
+        else:
+            logger.info("Stream %s already in queue", stream)
+        return do_not_forward_response()
+
+    if not was_added:
+        logger.info("Lead streamer %s connected", stream)
+        return forward_response(stream)
+
+    logger.info("Stream %s is now the lead streamer", stream)
+    pm.clear_last_stream_key()
+
+    logger.info("Starting stream for %s", stream)
+    submit_stream_control(pm.start_stream, user)
+    return forward_response(stream)
+
+
+def _default_response():
+    # Not a body-less 204: SRS treats any status other than 200, or an empty body, as a failed hook
+    # and rejects the client. The body is pre-serialized, so there's no encoding cost to save anyway.
+    return Response(content=PUBLISHING_ALLOWED_BODY, media_type="application/json")
+
+
+async def _handle_default(stream, param):
+    # on_record_begin, on_record_end, on_ocr and anything unknown
+    return _default_response()
+
+
+_ACTION_HANDLERS = {
+    'on_forward': _handle_on_forward,
+    'on_publish': _handle_on_publish,
+    'on_unpublish': _handle_on_unpublish,
+}
+
+
+# Byte markers for callbacks whose answer doesn't depend on the body. They are anchored on the JSON key,
+# and quotes inside string values are always escaped, so a stream key or param can never match them.
+# Bodies serialized with extra whitespace just miss the fast path and take the full parse below.
+MOTHERSTREAM_APP_MARKER = b'"app":"motherstream"'
+IGNORED_ACTION_MARKERS = (b'"action":"on_record_', b'"action":"on_ocr"')
+
 
 # RTMP handle all callback
 @rtmp_blueprint.post("/")
-async def on_publish(
-    request_id: str| None = Body(None),
-    action: str | None = Body(None),
-    opaque: str | None = Body(None),
-    vhost: str | None = Body(None),
-    app: str | None = Body(None),
-    stream: str | None = Body(None),
-    addr: str | None = Body(None),
-    param: str | None = Body(None),
-):
-    request_obj = {
-        "request_id": request_id,
-        "action": action,
-        "opaque": opaque,
-        "vhost": vhost,
-        "app": app,
-        "stream": stream,
-        "addr": addr,
-        "param": param
-    }
-    # RTMP hook logging disabled for cleaner logs
-    # print(request_obj)
-
-    record_stream = os.getenv('RECORD_STREAM')
-    forward_stream = {
-        "urls": [
-            # f"rtmp://{RTMP_HOST}:{RTMP_PORT}/motherstream/live{param}"
-        ]
-    }
-    do_not_forward_stream = {
-        "urls": [
-        ]
-    }
-
-    if record_stream: 
-        forward_stream["urls"].append(f"rtmp://{RTMP_RECORD_HOST}:{RTMP_RECORD_PORT}/live/{stream}") #nginx record path
-
+async def on_publish(request: Request):
+    raw = await request.body()
+
+    # Callbacks for the motherstream app itself are constant and never forwarded; bail before any parsing
+    if MOTHERSTREAM_APP_MARKER in raw:
+        return do_not_forward_response()
+    for marker in IGNORED_ACTION_MARKERS:
+        if marker in raw:
+            return _default_response()
+
+    try:
+        hook = RtmpHook.model_validate_json(raw)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+    # Intern so the action/app comparisons below hit the identity fast path
+    app = sys.intern(hook.app) if hook.app else None
     if app == 'motherstream':
-        # RTMP hook logging disabled for cleaner logs
-        # print("Motherstream app. Doing nothing.")
-        return JSONResponse(status_code=200, content={"code": 0, "data": do_not_forward_stream})
-
-
-    if action == 'on_unpublish':
-        if not stream:
-            logger.warning("on_unpublish called without stream key")
-            return JSONResponse(status_code=200, content={"code": 0, "data": do_not_forward_stream})
-
-        should_switch = False
-        with queue_lock:
-            lead_stream_key = process_manager.stream_queue.lead_streamer()
-
-            if stream == lead_stream_key:
-                should_switch = True
-                logger.info(f"Lead streamer {stream} disconnected. Switching to next in queue.")
-            else:
-                logger.info(f"Removing non-lead streamer {stream} from queue")
-                process_manager.stream_queue.remove_client_with_stream_key(stream)
-                return JSONResponse(status_code=200, content={"code": 0, "data": do_not_forward_stream})
-
-        if should_switch:
-            process_manager.switch_stream()
-            return JSONResponse(status_code=200, content={"code": 0, "data": do_not_forward_stream})
-
-    elif action == 'on_forward':
-        # Atomically check if this stream is the lead
-        with queue_lock:
-            lead_stream_key = process_manager.stream_queue.lead_streamer()
-            if stream and stream == lead_stream_key:
-                logger.info(f"FORWARDING: {stream}")
-                return JSONResponse(status_code=200, content={"code": 0, "data": forward_stream})
-            else:
-                logger.info(f"NOT FORWARDING: {stream}")
-                return JSONResponse(status_code=200, content={"code": 0, "data": do_not_forward_stream})
-
-    elif action == 'on_publish':
-        # Validate user first (no lock needed for this)
-        user = ensure_valid_user(stream)
-        if not user:
-            return JSONResponse(status_code=401, content={"message": "Invalid stream key. you do not have permission to join the queue."})
-        
-        should_start_stream = False
-        response_payload = do_not_forward_stream
-
-        with queue_lock:
-            lead_stream_key = process_manager.stream_queue.lead_streamer()
-
-            if not lead_stream_key:
-                if process_manager.should_block_streamer(stream):
-                    logger.info(f"Blocking {stream} from immediately reclaiming lead slot")
-                    return JSONResponse(
-                        status_code=401,
-                        content={"message": "Please wait before reconnecting.", "code": 0}
-                    )
-
-                was_added = process_manager.stream_queue.queue_client_stream_if_not_exists(user)
-                if was_added:
-                    logger.info(f"Stream {stream} is now the lead streamer")
-                    should_start_stream = True
-                    response_payload = forward_stream
-                    process_manager.clear_last_stream_key()
-                else:
-                    logger.info(f"Stream {stream} already scheduled as lead")
-                    lead_stream_key = process_manager.stream_queue.lead_streamer()
-                    if lead_stream_key == stream:
-                        response_payload = forward_stream
-
-            elif lead_stream_key == stream:
-                logger.info(f"Lead streamer {stream} connected")
-                response_payload = forward_stream
-
-            else:
-                was_added = process_manager.stream_queue.queue_client_stream_if_not_exists(user)
-                if was_added:
-                    logger.info(f"Stream {stream} joined queue behind lead {lead_stream_key}")
-                else:
-                    logger.info(f"Stream {stream} already in queue")
-
-        if should_start_stream:
-            logger.info(f"Starting stream for {stream}")
-            process_manager.start_stream(user)
-            return JSONResponse(status_code=200, content={"code": 0, "data": forward_stream})
-
-        return JSONResponse(status_code=200, content={"code": 0, "data": response_payload})
-    elif action == 'on_record_begin':
-        pass
-    elif action == 'on_record_end':
-        pass
-    elif action == 'on_ocr':
-        pass
-    
-    return JSONResponse(status_code=200, content={"message": "Publishing allowed", "code": 0})
+        return do_not_forward_response()
+
+    action = sys.intern(hook.action) if hook.action else None
+    stream = hook.stream
+
+    handler = _ACTION_HANDLERS.get(action, _handle_default)
+    return await handler(stream, hook.param)
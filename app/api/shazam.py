@@ -1,24 +1,67 @@
 import asyncio
-import subprocess
 import sys
-import json
-from shazamio import Shazam
-from io import BytesIO
-import wave
-import time
+from shazamio import Shazam, HTTPClient
+from shazamio.utils import validate_json
+from aiohttp import TCPConnector
+from aiohttp_retry import RetryClient, ExponentialRetry
+import struct
+from array import array
+
+try:
+    # Vectorized silence check; installed alongside shazamio
+    import numpy as np
+except ImportError:
+    np = None
 import logging
 import os
-import signal
 
 logger = logging.getLogger(__name__)
 # ffmpeg process
 process = None
 # Configuration Constants
-RATE = 44100           # Sample rate
+RATE = 16000           # Sample rate. Shazam fingerprints at 16 kHz, so let ffmpeg resample instead of shipping 44.1 kHz
 CHANNELS = 1           # Number of audio channels
 SECONDS = 10           # Duration to buffer before sending to Shazam
+READ_TIMEOUT = 5       # Extra seconds to wait for a full window before counting a failed read
+SAMPLE_WIDTH = 2       # 16-bit audio
+BYTES_PER_SECOND = RATE * CHANNELS * SAMPLE_WIDTH
+WINDOW_BYTES = SECONDS * BYTES_PER_SECOND
+SILENCE_THRESHOLD = 200  # Mean absolute int16 amplitude below which a window counts as dead air
 FFMPEG_INPUT = os.getenv("SHAZAM_RTMP_URL", "rtmp://motherstream.live/motherstream/live")
-SONG_DATA = {}
+
+class KeepAliveHTTPClient(HTTPClient):
+    """
+    shazamio's HTTPClient opens a new session (and TLS connection) for every request.
+    Keep one session open for the life of a probe so recognitions reuse the connection.
+    """
+
+    def __init__(self, retry_options=None):
+        super().__init__(retry_options=retry_options)
+        self._client = None
+
+    async def request(self, method, url, *args, **kwargs):
+        # Created lazily: aiohttp sessions belong to the event loop they were opened on,
+        # and every probe restart runs on a fresh loop.
+        if self._client is None:
+            self._client = RetryClient(
+                retry_options=self.retry_options,
+                raise_for_status=False,
+                trace_configs=[self.trace_config],
+                connector=TCPConnector(limit=4, keepalive_timeout=60),
+            )
+        async with self._client.request(method.upper(), url, **kwargs) as resp:
+            return await validate_json(resp, *args)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+# One client for the process. Same retry policy as shazamio's default HTTPClient.
+SHAZAM_HTTP_CLIENT = KeepAliveHTTPClient(
+    retry_options=ExponentialRetry(attempts=20, max_timeout=60, statuses={500, 502, 503, 504, 429}),
+)
+SHAZAM = Shazam(http_client=SHAZAM_HTTP_CLIENT)
 
 async def recognize_song(shazam, audio_data):
     """
@@ -44,34 +87,94 @@ async def create_ffmpeg_process(input_url):
     """
     ffmpeg_cmd = [
         'ffmpeg',
+        '-nostdin',                 # Never read the server's stdin
+        '-loglevel', 'error',       # stderr goes to DEVNULL, don't spend time formatting progress lines
+        '-threads', '1',            # Mono audio extraction doesn't need a decoder thread pool
+        '-fflags', 'nobuffer',      # Don't buffer the live input before decoding
+        '-flags', 'low_delay',
         '-i', input_url,
         '-vn',                      # Disable video
         '-ac', str(CHANNELS),       # Set number of audio channels
         '-ar', str(RATE),           # Set audio sampling rate
+        '-acodec', 'pcm_s16le',
         '-f', 's16le',              # Output raw PCM data
+        '-flush_packets', '0',      # Let ffmpeg fill its IO buffer instead of writing every audio packet
         'pipe:1'                    # Output to stdout
     ]
 
-    # create subprocess via asyncio
+    # create subprocess via asyncio. The reader limit covers a whole window so StreamReader doesn't
+    # pause/resume the pipe on every chunk while readexactly() accumulates it.
     process = await asyncio.create_subprocess_exec(
-        *ffmpeg_cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+        *ffmpeg_cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL, limit=WINDOW_BYTES)
     return process
 
-def pcm_to_wav(pcm_data):
+async def kill_shazamio_process(process, timeout=5):
+    """
+    Terminate the FFmpeg subprocess and reap it so it doesn't linger as a zombie holding the pipe.
+
+    :param process: FFmpeg asyncio subprocess.
+    :param timeout: Seconds to wait after SIGTERM before falling back to SIGKILL.
+    """
+    if process.returncode is not None:
+        return
+    try:
+        process.terminate()
+        await asyncio.wait_for(process.wait(), timeout)
+    except ProcessLookupError:
+        # Exited between the returncode check and the signal
+        await process.wait()
+    except asyncio.TimeoutError:
+        logger.warning("FFmpeg did not exit after SIGTERM. Killing it.")
+        process.kill()
+        await process.wait()
+
+def is_silent(pcm_data):
+    """
+    Check whether a window of raw PCM is too quiet to be worth sending to Shazam.
+
+    :param pcm_data: Raw little-endian 16-bit PCM byte data.
+    :return: True if the mean absolute amplitude is under SILENCE_THRESHOLD.
+    """
+    if np is None:
+        samples = array('h', pcm_data)
+        if sys.byteorder == 'big':
+            samples.byteswap()
+        if not samples:
+            return True
+        # map/abs/sum all stay in C, so this is still one pass without a Python-level loop
+        return sum(map(abs, samples)) // len(samples) < SILENCE_THRESHOLD
+
+    samples = np.frombuffer(pcm_data, dtype='<i2')
+    if not samples.size:
+        return True
+    # Widen before abs so -32768 doesn't overflow
+    return int(np.abs(samples, dtype=np.int32).mean()) < SILENCE_THRESHOLD
+
+def wav_header(data_size):
+    """
+    Build the 44-byte RIFF header for little-endian 16-bit PCM of the given size.
+
+    :param data_size: Size of the PCM payload in bytes.
+    :return: WAV header bytes.
     """
-    Convert raw PCM data to WAV format.
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, CHANNELS, RATE, BYTES_PER_SECOND, CHANNELS * SAMPLE_WIDTH, SAMPLE_WIDTH * 8,
+        b'data', data_size)
+
+# Every window is the same size, so the header only needs to be built once
+WAV_HEADER = wav_header(WINDOW_BYTES)
 
-    :param pcm_data: Raw PCM byte data.
-    :return: WAV formatted byte data.
+async def recognize_and_store(myself, shazam, wav_data):
     """
-    wav_buffer = BytesIO()
-    with wave.open(wav_buffer, 'wb') as wf:
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(2)  # 16-bit audio
-        wf.setframerate(RATE)
-        wf.writeframes(pcm_data)
-    wav_buffer.seek(0)
-    return wav_buffer.read()
+    Recognize one window and publish the result on the recognizer.
+
+    :param shazam: An instance of Shazam.
+    :param wav_data: WAV formatted byte data.
+    """
+    logger.info("Recognizing song.")
+    myself.song_data = extract_song_attributes(await recognize_song(shazam, wav_data))
 
 async def stream_audio_to_shazam(myself,process,shazam):
     """
@@ -80,53 +183,56 @@ async def stream_audio_to_shazam(myself,process,shazam):
     :param process: FFmpeg subprocess.
     :param shazam: An instance of Shazam.
     """
-    bytes_per_second = RATE * CHANNELS * 2  # 16-bit audio
-    total_bytes = SECONDS * bytes_per_second
     attempt = 0
-    buffer = BytesIO()
+    # One WAV buffer for the life of the probe. Every window is exactly WINDOW_BYTES, so each one is
+    # copied in place after the fixed header, but only while no recognition is reading it.
+    wav_data = bytearray(WAV_HEADER) + bytearray(WINDOW_BYTES)
+    # Recognition runs alongside capture so ffmpeg is drained continuously and windows stay live.
+    # At most one is in flight; windows that finish while it's still running are dropped.
+    recognition = None
 
     try:
         while True:
-            chunk = None
             try:
-                chunk = await asyncio.wait_for(process.stdout.read(4096),5) # Read in small chunks, timeout on read if takes too long (non-block)
+                # StreamReader already buffers internally, so read the whole window in one call.
+                # On timeout any partial window stays in the reader's buffer for the next attempt.
+                pcm_data = await asyncio.wait_for(process.stdout.readexactly(WINDOW_BYTES), SECONDS + READ_TIMEOUT)
             except asyncio.TimeoutError:
                 logger.info("Timeout trying to read any audio data...")
-            if chunk is None:
                 if attempt == 5:
                     logger.info("Havent gotten any data in a while. Killing this process.")
                     return
-                else:
-                    attempt += 1
-                    continue
-            else:
-                attempt = 0
-
-            buffer.write(chunk)
+                attempt += 1
+                continue
+            except asyncio.IncompleteReadError:
+                logger.info("FFmpeg output ended. Killing this process.")
+                return
+            attempt = 0
 
-            if buffer.tell() >= total_bytes:
-                # Extract the PCM data for the specified duration
-                buffer.seek(0)
-                pcm_data = buffer.read(total_bytes)
-                buffer = BytesIO()  # Reset buffer for next iteration
+            if recognition is not None and not recognition.done():
+                logger.info("Previous recognition still running. Dropping this window.")
+                continue
 
-                # Convert PCM to WAV
-                wav_data = pcm_to_wav(pcm_data)
+            if is_silent(pcm_data):
+                # Dead air between streamers, nothing to recognize. Report it the same way as a miss.
+                logger.info("Audio window is silent. Skipping recognition.")
+                myself.song_data = extract_song_attributes(None)
+                continue
 
-                logger.info("Recognizing song.")
-                # Pass WAV data to Shazamio
-                myself.song_data = extract_song_attributes(await recognize_song(shazam, wav_data))
+            # Convert PCM to WAV
+            wav_data[len(WAV_HEADER):] = pcm_data
 
-                logger.info("Sleeping.")
-                await asyncio.sleep(10)
-                buffer = BytesIO()
+            # Pass WAV data to Shazamio
+            recognition = asyncio.create_task(recognize_and_store(myself, shazam, wav_data))
 
     except asyncio.CancelledError:
         logger.info("Streaming cancelled.")
     finally:
+        if recognition is not None and not recognition.done():
+            recognition.cancel()
         if process is not None:
             logger.info("Killing the shazam probe...")
-            process.terminate()
+            await kill_shazamio_process(process)
             process = None
         logger.info("Done killing the shazam probe.")
 
@@ -135,18 +241,26 @@ async def main(myself):
     """
     Main coroutine to set up FFmpeg and start streaming to Shazam.
     """
-    shazam = Shazam()
-    process = await create_ffmpeg_process(FFMPEG_INPUT)
-    
-    if not process.stdout:
-        logger.error("Failed to open FFmpeg stdout.")
-        return
+    try:
+        process = await create_ffmpeg_process(FFMPEG_INPUT)
+
+        if not process.stdout:
+            logger.error("Failed to open FFmpeg stdout.")
+            return
 
-    await stream_audio_to_shazam(myself,process,shazam)
+        await stream_audio_to_shazam(myself,process,SHAZAM)
+    finally:
+        # The session is bound to this asyncio.run() loop; the next probe opens its own
+        await SHAZAM_HTTP_CLIENT.close()
 
 class SongRecognizer:
 
-    song_data = None
+    __slots__ = ('song_data',)
+
+    def __init__(self):
+        # Latest result, replaced wholesale by the probe's event loop thread and only read elsewhere,
+        # so a plain attribute is enough. Never mutate the dict in place.
+        self.song_data = None
 
     def recognize_song_full(self):
         asyncio.run(main(self))
@@ -181,26 +295,24 @@ def extract_song_attributes(data):
     if not data:
         return result
 
+    track = data.get('track') or {}
+
     # Extract song name
-    result['song_name'] = data.get('track', {}).get('title')
+    result['song_name'] = track.get('title')
 
     # Extract artist
-    result['artist'] = data.get('track', {}).get('subtitle')
-
-    # Extract label by searching through sections
-    sections = data.get('track', {}).get('sections', [])
-    for section in sections:
-        if section.get('type') == 'SONG':
-            metadata = section.get('metadata', [])
-            for item in metadata:
-                if item.get('title') == 'Label':
-                    result['label'] = item.get('text')
-                    break
-            if result['label']:
-                break
+    result['artist'] = track.get('subtitle')
+
+    # Extract label from the first SONG section's metadata
+    sections = track.get('sections', ())
+    result['label'] = next(
+        (item.get('text')
+         for section in sections if section.get('type') == 'SONG'
+         for item in section.get('metadata', ()) if item.get('title') == 'Label'),
+        None)
 
     # Extract album cover link
-    result['album_cover_link'] = data.get('track', {}).get('images', {}).get('coverart')
+    result['album_cover_link'] = (track.get('images') or {}).get('coverart')
 
     # Compute confidence level based on matches (if available)
     matches = data.get('matches', [])
@@ -9,7 +9,6 @@ logger = logging.getLogger(__name__)
 
 def register_app(app,process_manager):
 
-    from main import process_manager
     # Start the process queueing thread
     logger.info("Starting process queueing thread")
     queue_thread = threading.Thread(target=process_manager.process_queue, daemon=True)
@@ -16,11 +16,28 @@ import time
 from typing import Optional, Dict, List, Tuple
 from collections import deque
 from dataclasses import dataclass
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
+MEDIA_STATE_PLAYING = "OBS_MEDIA_STATE_PLAYING"
 
-@dataclass
+# Non-playing OBS media states -> (issue if media time is stuck, warning if it's still progressing)
+MEDIA_STATE_LABELS = {
+    "OBS_MEDIA_STATE_BUFFERING": ("PIPELINE_BUFFERING", "PIPELINE_BUFFERING_BUT_PROGRESSING"),
+    "OBS_MEDIA_STATE_STOPPED": ("PIPELINE_STOPPED", "PIPELINE_STOPPED_BUT_PROGRESSING"),
+    "OBS_MEDIA_STATE_ERROR": ("MEDIA_STATE_ERROR", "MEDIA_STATE_ERROR_BUT_PROGRESSING"),
+}
+
+
+# Any other state (paused, opening, ...) gets generic labels. A source can sit in one of these for
+# a long time, so build each pair once rather than formatting two strings on every check.
+@lru_cache(maxsize=32)
+def other_media_state_labels(media_state: str) -> Tuple[str, str]:
+    return f"PIPELINE_STATE_{media_state}", f"PIPELINE_STATE_{media_state}_BUT_PROGRESSING"
+
+
+@dataclass(slots=True)
 class GStreamerHealthStatus:
     """Health status of GStreamer source"""
     is_healthy: bool
@@ -63,11 +80,13 @@ class GStreamerHealthChecker:
         self.jitter_threshold_ms = jitter_threshold_ms
         
         # Historical tracking
-        self.media_time_history = deque(maxlen=60)  # Last 60 samples
+        # Last 60 samples, one deque per field: only timestamps and media times are ever read back
+        self.history_timestamps = deque(maxlen=60)
+        self.history_media_times = deque(maxlen=60)
         self.last_media_time = None
         self.last_check_timestamp = None
         self.stall_start_time = None
-        self.stall_events = deque(maxlen=60)  # Track stalls in last minute
+        self.stall_events = deque(maxlen=60)  # Stall times within the last minute, capped at 60
         
         # Metrics
         self.total_stalls = 0
@@ -91,7 +110,30 @@ class GStreamerHealthChecker:
         Returns:
             GStreamerHealthStatus with detailed health info
         """
-        current_time = time.time()
+        # No source reporting anything (startup, between sources) and no stalls to count: there is
+        # nothing to measure. The check timestamp is only read when both this and the next media
+        # time are set, so it doesn't need updating either.
+        if media_time is None and not media_state and not self.stall_events:
+            self.last_media_time = None
+            return self._healthy_status(None)
+        
+        current_time = time.monotonic()
+        # Compared once here; every branch below reuses the result
+        playing = media_state == MEDIA_STATE_PLAYING
+        
+        # Steady playback is the common case: media time advancing in step with real time, with no
+        # open or recent stalls. Nothing below can add an issue or penalty then, so skip straight
+        # to the healthy result.
+        if playing and media_time is not None and self.last_media_time is not None and self.stall_start_time is None:
+            time_delta_ms = media_time - self.last_media_time
+            real_time_delta_ms = (current_time - self.last_check_timestamp) * 1000
+            if time_delta_ms != 0 and abs(time_delta_ms - real_time_delta_ms) <= self.jitter_threshold_ms:
+                stall_events = self.stall_events
+                while stall_events and current_time - stall_events[0] >= 60:
+                    stall_events.popleft()
+                if not stall_events:
+                    return self._steady_playback_status(current_time, media_time, obs_fps)
+        
         issues = []
         warnings = []
         
@@ -109,21 +151,17 @@ class GStreamerHealthChecker:
             real_time_delta_ms = (current_time - self.last_check_timestamp) * 1000
             
             # Track history
-            self.media_time_history.append({
-                'timestamp': current_time,
-                'media_time': media_time,
-                'time_delta_ms': time_delta_ms,
-                'real_time_delta_ms': real_time_delta_ms
-            })
+            self.history_timestamps.append(current_time)
+            self.history_media_times.append(media_time)
             
             # Check for stall (media time not advancing)
-            if media_state == "OBS_MEDIA_STATE_PLAYING":
+            if playing:
                 if time_delta_ms == 0:
                     media_time_progressing = False
                     
                     if self.stall_start_time is None:
                         self.stall_start_time = current_time
-                        logger.warning(f"Media time stall detected at {media_time}ms")
+                        logger.warning("Media time stall detected at %sms", media_time)
                     
                     media_time_stall_duration = current_time - self.stall_start_time
                     
@@ -142,7 +180,7 @@ class GStreamerHealthChecker:
                     # Media time is progressing
                     if self.stall_start_time is not None:
                         stall_duration = current_time - self.stall_start_time
-                        logger.info(f"Media time stall recovered after {stall_duration:.2f}s")
+                        logger.info("Media time stall recovered after %.2fs", stall_duration)
                         self.stall_start_time = None
                     
                     # Check for time jitter (irregular progression)
@@ -161,40 +199,24 @@ class GStreamerHealthChecker:
                         self.total_jitter_events += 1
                     
                     # Calculate effective framerate from media time progression
-                    if len(self.media_time_history) >= 2:
-                        recent_history = list(self.media_time_history)[-10:]  # Last 10 samples
-                        time_span_real = recent_history[-1]['timestamp'] - recent_history[0]['timestamp']
-                        time_span_media = recent_history[-1]['media_time'] - recent_history[0]['media_time']
-                        
-                        if time_span_real > 0 and time_span_media > 0:
-                            # Effective framerate based on media time flow
-                            effective_framerate = (time_span_media / time_span_real) * (obs_fps if obs_fps else 30) / 1000
+                    effective_framerate = self._effective_framerate(obs_fps)
         
         # 2. Interpret OBS media state with context
-        if media_state and media_state != "OBS_MEDIA_STATE_PLAYING":
-            if media_state == "OBS_MEDIA_STATE_BUFFERING":
-                if media_time_progressing:
-                    warnings.append("PIPELINE_BUFFERING_BUT_PROGRESSING")
-                else:
-                    issues.append("PIPELINE_BUFFERING")
-                    buffer_underrun_likely = True
-            elif media_state == "OBS_MEDIA_STATE_STOPPED":
-                if media_time_progressing:
-                    warnings.append("PIPELINE_STOPPED_BUT_PROGRESSING")
-                else:
-                    issues.append("PIPELINE_STOPPED")
-                    buffer_underrun_likely = True
-            elif media_state == "OBS_MEDIA_STATE_ERROR":
+        if media_state and not playing:
+            labels = MEDIA_STATE_LABELS.get(media_state)
+            if labels is not None:
+                issue, warning = labels
                 if media_time_progressing:
-                    warnings.append("MEDIA_STATE_ERROR_BUT_PROGRESSING")
+                    warnings.append(warning)
                 else:
-                    issues.append("MEDIA_STATE_ERROR")
+                    issues.append(issue)
                     buffer_underrun_likely = True
             else:
+                issue, warning = other_media_state_labels(media_state)
                 if not media_time_progressing:
-                    issues.append(f"PIPELINE_STATE_{media_state}")
+                    issues.append(issue)
                 else:
-                    warnings.append(f"PIPELINE_STATE_{media_state}_BUT_PROGRESSING")
+                    warnings.append(warning)
         
         # 3. Check for decode lag (FPS is good but media time jumpy)
         if obs_fps and obs_fps > 25 and media_time_jitter > 200:
@@ -202,13 +224,17 @@ class GStreamerHealthChecker:
             decode_lag_detected = True
         
         # 4. Check stall frequency
-        stall_count_last_minute = sum(1 for t in self.stall_events if current_time - t < 60)
+        # Stall times are appended in order, so expired ones are always at the left end
+        stall_events = self.stall_events
+        while stall_events and current_time - stall_events[0] >= 60:
+            stall_events.popleft()
+        stall_count_last_minute = len(stall_events)
         if stall_count_last_minute > 5:
             issues.append(f"FREQUENT_STALLS_{stall_count_last_minute}/min")
             buffer_underrun_likely = True
         
         # 5. Check for "visible but not playing" (frozen frame)
-        if is_visible and media_state != "OBS_MEDIA_STATE_PLAYING" and not media_time_progressing:
+        if is_visible and not playing and not media_time_progressing:
             issues.append(f"VISIBLE_NOT_PLAYING_{media_state}")
         
         # Calculate health score
@@ -237,20 +263,7 @@ class GStreamerHealthChecker:
         
         # Determine health trend
         is_healthy = health_score > 70 and not issues
-        
-        if is_healthy:
-            self.consecutive_healthy_checks += 1
-            self.consecutive_unhealthy_checks = 0
-        else:
-            self.consecutive_unhealthy_checks += 1
-            self.consecutive_healthy_checks = 0
-        
-        if self.consecutive_unhealthy_checks > 5:
-            health_trend = "degrading"
-        elif self.consecutive_healthy_checks > 10:
-            health_trend = "improving"
-        else:
-            health_trend = "stable"
+        health_trend = self._update_trend(is_healthy)
         
         # Update state for next check
         self.last_media_time = media_time
@@ -271,6 +284,63 @@ class GStreamerHealthChecker:
             health_trend=health_trend
         )
     
+    def _steady_playback_status(self, current_time: float, media_time: int,
+                                obs_fps: Optional[float]) -> GStreamerHealthStatus:
+        """check_health result for a tick that is known to be healthy"""
+        self.history_timestamps.append(current_time)
+        self.history_media_times.append(media_time)
+        self.last_media_time = media_time
+        self.last_check_timestamp = current_time
+        return self._healthy_status(self._effective_framerate(obs_fps))
+    
+    def _healthy_status(self, effective_framerate: Optional[float]) -> GStreamerHealthStatus:
+        """Record a healthy check and build its status"""
+        return GStreamerHealthStatus(
+            is_healthy=True,
+            health_score=100.0,
+            issues=[],
+            warnings=[],
+            media_time_progressing=True,
+            media_time_stall_duration=0.0,
+            media_time_jitter=0.0,
+            effective_framerate=effective_framerate,
+            decode_lag_detected=False,
+            buffer_underrun_likely=False,
+            stall_count_last_minute=0,
+            health_trend=self._update_trend(True)
+        )
+    
+    def _effective_framerate(self, obs_fps: Optional[float]) -> Optional[float]:
+        """Framerate implied by media time flow over the last 10 samples"""
+        timestamps = self.history_timestamps
+        if len(timestamps) < 2:
+            return None
+        # Only the endpoints matter, and deque indexing near either end is cheap,
+        # so read them directly instead of copying the deque.
+        oldest = -min(len(timestamps), 10)
+        media_times = self.history_media_times
+        time_span_real = timestamps[-1] - timestamps[oldest]
+        time_span_media = media_times[-1] - media_times[oldest]
+        
+        if time_span_real > 0 and time_span_media > 0:
+            return (time_span_media / time_span_real) * (obs_fps if obs_fps else 30) / 1000
+        return None
+    
+    def _update_trend(self, is_healthy: bool) -> str:
+        """Record this check's outcome and return the health trend"""
+        if is_healthy:
+            self.consecutive_healthy_checks += 1
+            self.consecutive_unhealthy_checks = 0
+        else:
+            self.consecutive_unhealthy_checks += 1
+            self.consecutive_healthy_checks = 0
+        
+        if self.consecutive_unhealthy_checks > 5:
+            return "degrading"
+        if self.consecutive_healthy_checks > 10:
+            return "improving"
+        return "stable"
+    
     def get_diagnostics(self) -> Dict:
         """Get diagnostic information about GStreamer source health"""
         return {
@@ -280,12 +350,13 @@ class GStreamerHealthChecker:
             'consecutive_healthy_checks': self.consecutive_healthy_checks,
             'consecutive_unhealthy_checks': self.consecutive_unhealthy_checks,
             'currently_stalled': self.stall_start_time is not None,
-            'history_samples': len(self.media_time_history)
+            'history_samples': len(self.history_timestamps)
         }
     
     def reset(self):
         """Reset health checker state"""
-        self.media_time_history.clear()
+        self.history_timestamps.clear()
+        self.history_media_times.clear()
         self.stall_events.clear()
         self.last_media_time = None
         self.last_check_timestamp = None
@@ -294,11 +365,17 @@ class GStreamerHealthChecker:
         self.consecutive_unhealthy_checks = 0
 
 
-def analyze_gstreamer_health_from_csv(csv_file: str) -> Dict:
+# Rows of a health log analyzed at a time
+CSV_ANALYSIS_CHUNK_ROWS = 100_000
+
+
+def analyze_gstreamer_health_from_csv(csv_file: str, jitter_threshold_ms: int = 100) -> Dict:
     """
     Analyze GStreamer health from a stream-health CSV file.
     
-    Useful for post-mortem analysis of choppy streams.
+    Useful for post-mortem analysis of choppy streams. Applies the same rules as
+    GStreamerHealthChecker.check_health, but over whole columns at once and timed by
+    the rows' own timestamps rather than the clock at analysis time.
     
     Returns dict with:
         - stall_events: List of detected stalls
@@ -306,43 +383,124 @@ def analyze_gstreamer_health_from_csv(csv_file: str) -> Dict:
         - health_timeline: Health score over time
         - recommendations: List of issues found
     """
-    import pandas as pd
+    import csv
+    from itertools import islice
+    import numpy as np
     
-    df = pd.read_csv(csv_file)
-    
-    checker = GStreamerHealthChecker()
     stall_events = []
     jitter_events = []
     health_timeline = []
+    n = 0
+    health_score_total = 0.0
+    healthy_count = 0
     
-    for idx, row in df.iterrows():
-        status = checker.check_health(
-            media_state=row['media_state'],
-            media_time=row['media_time'],
-            obs_fps=row['obs_fps'],
-            is_visible=row['is_visible']
-        )
-        
-        health_timeline.append({
-            'timestamp': row['timestamp'],
-            'health_score': status.health_score,
-            'is_healthy': status.is_healthy
-        })
-        
-        if not status.media_time_progressing:
-            stall_events.append({
-                'timestamp': row['timestamp'],
-                'timestamp_str': row['timestamp_str'],
-                'media_time': row['media_time'],
-                'duration': status.media_time_stall_duration
-            })
+    # Carried from one chunk to the next
+    prev_media_time = np.nan
+    prev_timestamp = np.nan
+    open_stall_start = None  # timestamp of the first row of a stall that hasn't recovered yet
+    recent_stalls = np.empty(0)  # stall timestamps that may still fall within a later row's minute
+    
+    # Only five of the log's columns are needed. Read them with the csv module and hand them to
+    # NumPy a chunk at a time, so a long log never has all of its raw rows in memory at once.
+    with open(csv_file, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        columns = [header.index(name) for name in
+                   ('timestamp', 'timestamp_str', 'media_state', 'media_time', 'obs_fps')]
         
-        if status.media_time_jitter > 100:
-            jitter_events.append({
-                'timestamp': row['timestamp'],
-                'timestamp_str': row['timestamp_str'],
-                'jitter_ms': status.media_time_jitter
-            })
+        while True:
+            rows = [[row[i] for i in columns] for row in islice(reader, CSV_ANALYSIS_CHUNK_ROWS)]
+            if not rows:
+                break
+            m = len(rows)
+            ts_col, ts_str_col, state_col, media_time_col, fps_col = zip(*rows)
+            del rows
+            
+            timestamps = np.array(ts_col, dtype=np.float64)
+            timestamp_strs = np.array(ts_str_col, dtype=object)
+            # Empty cells are missing readings
+            media_time = np.array([v or 'nan' for v in media_time_col], dtype=np.float64)
+            obs_fps = np.array([v or 'nan' for v in fps_col], dtype=np.float64)
+            playing = np.array(state_col, dtype=object) == MEDIA_STATE_PLAYING
+            
+            # Deltas against the previous row; NaN where either side has no media time
+            time_delta_ms = np.diff(media_time, prepend=prev_media_time)
+            real_time_delta_ms = np.diff(timestamps, prepend=prev_timestamp) * 1000
+            
+            # 1. Stalls: playing but media time didn't move. A stall stays open until a playing row
+            #    progresses again, and its duration runs from the first stalled row after that.
+            row_idx = np.arange(m)
+            stalled = playing & (time_delta_ms == 0)
+            recovered = playing & (time_delta_ms != 0) & ~np.isnan(time_delta_ms)
+            last_recovery = np.maximum.accumulate(np.where(recovered, row_idx, -1))
+            next_stall = np.append(np.minimum.accumulate(np.where(stalled, row_idx, m)[::-1])[::-1], m)
+            stall_start = next_stall[last_recovery + 1]
+            stall_start_ts = timestamps[np.minimum(stall_start, m - 1)]
+            if open_stall_start is not None:
+                # Until this chunk's first recovery, stalls continue the one left open by the last chunk
+                stall_start_ts = np.where(last_recovery < 0, open_stall_start, stall_start_ts)
+            stall_duration = np.where(stalled, timestamps - stall_start_ts, 0.0)
+            
+            if last_recovery[-1] >= 0 or open_stall_start is None:
+                first_open = next_stall[last_recovery[-1] + 1]
+                open_stall_start = timestamps[first_open] if first_open < m else None
+            
+            # 2. Jitter: playing and progressing, but out of step with real time
+            delta_error_ms = np.abs(time_delta_ms - real_time_delta_ms)
+            jittery = recovered & (delta_error_ms > jitter_threshold_ms)
+            jitter = np.where(jittery, delta_error_ms, 0.0)
+            decode_lag_issue = (obs_fps > 25) & (jitter > 200)
+            decode_lag = (jittery & (time_delta_ms > real_time_delta_ms * 1.5)) | decode_lag_issue
+            
+            # 3. Stalls within the last minute of each row, capped like the live deque. Rows are in
+            #    time order, so stalls so far minus those at least a minute old is a searchsorted.
+            stall_times = np.concatenate((recent_stalls, timestamps[stalled]))
+            stalls_so_far = len(recent_stalls) + np.cumsum(stalled)
+            expired = np.searchsorted(stall_times, timestamps - 60, side='right')
+            stall_count = np.minimum(stalls_so_far - expired, 60)
+            recent_stalls = stall_times[stall_times > timestamps[-1] - 60][-60:]
+            
+            buffer_underrun = (stall_duration > 2.0) | (stall_count > 5)
+            has_issue = (stall_duration > 0.5) | decode_lag_issue | (stall_count > 5)
+            
+            health_score = (
+                100.0
+                - 60.0 * stalled
+                - 30.0 * buffer_underrun
+                - 20.0 * decode_lag
+                - np.select([jitter > 200, jitter > 100], [15.0, 5.0], 0.0)
+                - np.select([stall_count > 10, stall_count > 5], [25.0, 10.0], 0.0)
+            )
+            np.maximum(health_score, 0.0, out=health_score)
+            is_healthy = (health_score > 70) & ~has_issue
+            
+            n += m
+            health_score_total += float(health_score.sum())
+            healthy_count += int(np.count_nonzero(is_healthy))
+            prev_media_time = media_time[-1]
+            prev_timestamp = timestamps[-1]
+            
+            # Only now go back to Python objects, and only for the rows that are reported
+            health_timeline.extend(
+                {'timestamp': ts, 'health_score': score, 'is_healthy': healthy}
+                for ts, score, healthy in zip(timestamps.tolist(), health_score.tolist(), is_healthy.tolist())
+            )
+            
+            stall_idx = np.flatnonzero(stalled)
+            stall_events.extend(
+                {'timestamp': ts, 'timestamp_str': ts_str, 'media_time': mt, 'duration': duration}
+                for ts, ts_str, mt, duration in zip(
+                    timestamps[stall_idx].tolist(), timestamp_strs[stall_idx].tolist(),
+                    media_time[stall_idx].tolist(), stall_duration[stall_idx].tolist())
+            )
+            
+            jitter_idx = np.flatnonzero(jitter > 100)
+            jitter_events.extend(
+                {'timestamp': ts, 'timestamp_str': ts_str, 'jitter_ms': jitter_ms}
+                for ts, ts_str, jitter_ms in zip(
+                    timestamps[jitter_idx].tolist(), timestamp_strs[jitter_idx].tolist(),
+                    jitter[jitter_idx].tolist())
+            )
     
     # Generate recommendations
     recommendations = []
@@ -359,7 +517,7 @@ def analyze_gstreamer_health_from_csv(csv_file: str) -> Dict:
         recommendations.append("  → Consider enabling videorate/audiorate in pipeline")
         recommendations.append("  → Network jitter may be causing issues")
     
-    avg_health = sum(h['health_score'] for h in health_timeline) / len(health_timeline) if health_timeline else 100
+    avg_health = health_score_total / n if n else 100
     if avg_health < 70:
         recommendations.append(f"Overall GStreamer health poor (avg: {avg_health:.1f}/100)")
         recommendations.append("  → Review pipeline configuration")
@@ -374,7 +532,7 @@ def analyze_gstreamer_health_from_csv(csv_file: str) -> Dict:
             'total_stalls': len(stall_events),
             'total_jitter_events': len(jitter_events),
             'average_health_score': avg_health,
-            'healthy_percentage': sum(1 for h in health_timeline if h['is_healthy']) / len(health_timeline) * 100 if health_timeline else 100
+            'healthy_percentage': healthy_count / n * 100 if n else 100
         }
     }
 
@@ -12,20 +12,38 @@ Critical for detecting:
 - Rendering issues
 """
 
+import math
 import time
 import logging
 import threading
 from typing import Optional, Dict, List
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from datetime import datetime
-from collections import deque
+from collections import Counter, deque
+from operator import attrgetter
 import csv
 import os
 
 logger = logging.getLogger(__name__)
 
+# CSV log columns, in order. Each is an OBSOutputSnapshot field; issues must stay second to last.
+CSV_FIELDS = (
+    'timestamp', 'timestamp_str', 'active_fps', 'average_frame_time',
+    'render_skipped_frames', 'render_total_frames', 'output_skipped_frames',
+    'output_total_frames', 'output_bytes', 'output_duration', 'cpu_usage', 'memory_usage',
+    'is_streaming', 'render_skip_rate', 'encoding_skip_rate',
+    'current_bitrate_mbps', 'health_score', 'issues', 'is_degraded'
+)
+_snapshot_values = attrgetter(*CSV_FIELDS)
 
-@dataclass
+
+def snapshot_csv_row(snapshot) -> tuple:
+    """CSV row for a snapshot, read straight off its fields rather than via asdict()'s deep copy"""
+    values = _snapshot_values(snapshot)
+    return values[:-2] + ('; '.join(snapshot.issues), values[-1])
+
+
+@dataclass(slots=True)
 class OBSOutputSnapshot:
     """Snapshot of OBS output performance at a point in time"""
     timestamp: float
@@ -87,10 +105,14 @@ class OBSOutputMonitor:
         self.poll_interval = poll_interval
         self.history_size = history_size
         
+        # Only the monitor thread appends, and deque.append is atomic, so readers don't need the lock.
+        # The newest snapshot is also published as a single reference for get_current_status.
         self.snapshots = deque(maxlen=history_size)
+        self._latest: Optional[OBSOutputSnapshot] = None
         self.is_monitoring = False
         self.monitor_thread = None
-        self.lock = threading.Lock()
+        self._stop_event = threading.Event()  # wakes the loop out of its poll wait on stop
+        self.lock = threading.Lock()  # guards start/stop state transitions
         
         # Baseline for rate calculations
         self.last_snapshot_time = None
@@ -108,11 +130,15 @@ class OBSOutputMonitor:
         self.FRAME_TIME_WARNING = 40.0  # ms (should be ~33ms for 30fps)
         self.FRAME_TIME_CRITICAL = 50.0  # ms
         
+        # CSV rows collect in the file's 64 KiB buffer and reach disk at most this often (seconds)
+        self.CSV_FLUSH_INTERVAL = 30.0
+        
         os.makedirs(log_dir, exist_ok=True)
         
         # CSV file (one per session)
         self.csv_file = None
         self.csv_writer = None
+        self._last_flush = 0.0
         
     def start_monitoring(self):
         """Start continuous monitoring in background thread"""
@@ -122,19 +148,15 @@ class OBSOutputMonitor:
                 return
             
             self.is_monitoring = True
+            self._stop_event.clear()
             
             # Create new CSV file
             timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
             csv_path = os.path.join(self.log_dir, f"obs-output-{timestamp}.csv")
-            self.csv_file = open(csv_path, 'w', newline='')
-            self.csv_writer = csv.DictWriter(self.csv_file, fieldnames=[
-                'timestamp', 'timestamp_str', 'active_fps', 'average_frame_time',
-                'render_skipped_frames', 'render_total_frames', 'output_skipped_frames',
-                'output_total_frames', 'output_bytes', 'cpu_usage', 'memory_usage',
-                'is_streaming', 'render_skip_rate', 'encoding_skip_rate',
-                'current_bitrate_mbps', 'health_score', 'issues', 'is_degraded'
-            ])
-            self.csv_writer.writeheader()
+            self.csv_file = open(csv_path, 'w', newline='', buffering=1 << 16)
+            self.csv_writer = csv.writer(self.csv_file)
+            self.csv_writer.writerow(CSV_FIELDS)
+            self._last_flush = time.monotonic()
             
             self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
             self.monitor_thread.start()
@@ -148,6 +170,7 @@ class OBSOutputMonitor:
                 return
             
             self.is_monitoring = False
+            self._stop_event.set()
             
         # Wait for thread to finish
         if self.monitor_thread:
@@ -166,19 +189,22 @@ class OBSOutputMonitor:
     
     def _monitor_loop(self):
         """Main monitoring loop"""
-        while self.is_monitoring:
+        # Polls run on a fixed cadence, so the time spent collecting doesn't stretch the interval
+        next_poll = time.monotonic()
+        while not self._stop_event.is_set():
             try:
                 snapshot = self._collect_snapshot()
                 if snapshot:
-                    with self.lock:
-                        self.snapshots.append(snapshot)
+                    self.snapshots.append(snapshot)
+                    self._latest = snapshot
                     
                     # Log to CSV
                     if self.csv_writer:
-                        row = asdict(snapshot)
-                        row['issues'] = '; '.join(row['issues'])
-                        self.csv_writer.writerow(row)
-                        self.csv_file.flush()
+                        self.csv_writer.writerow(snapshot_csv_row(snapshot))
+                        now = time.monotonic()
+                        if now - self._last_flush >= self.CSV_FLUSH_INTERVAL:
+                            self.csv_file.flush()
+                            self._last_flush = now
                     
                     # Log warnings
                     if snapshot.issues:
@@ -187,7 +213,12 @@ class OBSOutputMonitor:
             except Exception as e:
                 logger.error(f"Error in OBS output monitor loop: {e}")
             
-            time.sleep(self.poll_interval)
+            next_poll += self.poll_interval
+            now = time.monotonic()
+            if next_poll < now:
+                # Fell behind; poll again right away instead of bursting to catch up
+                next_poll = now
+            self._stop_event.wait(next_poll - now)
     
     def _collect_snapshot(self) -> Optional[OBSOutputSnapshot]:
         """Collect current OBS output stats"""
@@ -198,17 +229,19 @@ class OBSOutputMonitor:
             
             timestamp = time.time()
             
-            # Extract metrics
-            active_fps = stats.get('activeFps')
-            average_frame_time = stats.get('averageFrameRenderTime')
-            render_skipped = stats.get('renderSkippedFrames', 0)
-            render_total = stats.get('renderTotalFrames', 0)
-            output_skipped = stats.get('outputSkippedFrames', 0)
-            output_total = stats.get('outputTotalFrames', 0)
-            output_bytes = stats.get('outputBytes', 0)
-            output_duration = stats.get('outputDuration', 0)
-            cpu_usage = stats.get('cpuUsage')
-            memory_usage = stats.get('memoryUsage')
+            # Extract metrics. GetStats doesn't report every key (output bytes/duration belong to the
+            # stream status), so look each one up with its default rather than all-or-nothing.
+            get = stats.get
+            active_fps = get('activeFps')
+            average_frame_time = get('averageFrameRenderTime')
+            render_skipped = get('renderSkippedFrames', 0)
+            render_total = get('renderTotalFrames', 0)
+            output_skipped = get('outputSkippedFrames', 0)
+            output_total = get('outputTotalFrames', 0)
+            output_bytes = get('outputBytes', 0)
+            output_duration = get('outputDuration', 0)
+            cpu_usage = get('cpuUsage')
+            memory_usage = get('memoryUsage')
             
             # Check streaming status
             try:
@@ -284,14 +317,14 @@ class OBSOutputMonitor:
                        is_streaming: bool) -> tuple[float, List[str], bool]:
         """Analyze OBS output health and return (health_score, issues, is_degraded)"""
         
+        # Not streaming is not an issue. Nothing else applies then, so return before any setup.
+        if not is_streaming:
+            return 100.0, [], False
+        
         health_score = 100.0
         issues = []
         is_degraded = False
         
-        # Not streaming is not an issue
-        if not is_streaming:
-            return 100.0, [], False
-        
         # Check FPS
         if active_fps is not None:
             if active_fps < self.FPS_CRITICAL:
@@ -354,33 +387,52 @@ class OBSOutputMonitor:
         
         # Calculate statistics
         total_snapshots = len(self.snapshots)
-        degraded_snapshots = sum(1 for s in self.snapshots if s.is_degraded)
-        degraded_percent = (degraded_snapshots / total_snapshots) * 100
-        
-        fps_values = [s.active_fps for s in self.snapshots if s.active_fps is not None]
-        avg_fps = sum(fps_values) / len(fps_values) if fps_values else 0
-        min_fps = min(fps_values) if fps_values else 0
-        
-        frame_time_values = [s.average_frame_time for s in self.snapshots if s.average_frame_time is not None]
-        avg_frame_time = sum(frame_time_values) / len(frame_time_values) if frame_time_values else 0
-        max_frame_time = max(frame_time_values) if frame_time_values else 0
-        
-        render_skip_rates = [s.render_skip_rate for s in self.snapshots if s.render_skip_rate is not None and s.render_skip_rate > 0]
-        max_render_skip = max(render_skip_rates) if render_skip_rates else 0
+        # One pass over the snapshots instead of a list and a reduction per metric
+        degraded_snapshots = 0
+        fps_sum = 0.0
+        fps_count = 0
+        min_fps = math.inf
+        frame_time_sum = 0.0
+        frame_time_count = 0
+        max_frame_time = -math.inf
+        max_render_skip = 0
+        max_encoding_skip = 0
+        for s in self.snapshots:
+            if s.is_degraded:
+                degraded_snapshots += 1
+            fps = s.active_fps
+            if fps is not None:
+                fps_sum += fps
+                fps_count += 1
+                if fps < min_fps:
+                    min_fps = fps
+            frame_time = s.average_frame_time
+            if frame_time is not None:
+                frame_time_sum += frame_time
+                frame_time_count += 1
+                if frame_time > max_frame_time:
+                    max_frame_time = frame_time
+            # Only positive skip rates count, so the peaks start at 0
+            if s.render_skip_rate is not None and s.render_skip_rate > max_render_skip:
+                max_render_skip = s.render_skip_rate
+            if s.encoding_skip_rate is not None and s.encoding_skip_rate > max_encoding_skip:
+                max_encoding_skip = s.encoding_skip_rate
         
-        encoding_skip_rates = [s.encoding_skip_rate for s in self.snapshots if s.encoding_skip_rate is not None and s.encoding_skip_rate > 0]
-        max_encoding_skip = max(encoding_skip_rates) if encoding_skip_rates else 0
+        degraded_percent = (degraded_snapshots / total_snapshots) * 100
+        avg_fps = fps_sum / fps_count if fps_count else 0
+        if not fps_count:
+            min_fps = 0
+        avg_frame_time = frame_time_sum / frame_time_count if frame_time_count else 0
+        if not frame_time_count:
+            max_frame_time = 0
         
         # Count issue types
-        all_issues = []
+        issue_counts = Counter()
         for s in self.snapshots:
-            all_issues.extend(s.issues)
-        
-        issue_counts = {}
-        for issue in all_issues:
-            # Get issue type (before the _number)
-            issue_type = issue.split('_')[0] + '_' + issue.split('_')[1] if '_' in issue else issue
-            issue_counts[issue_type] = issue_counts.get(issue_type, 0) + 1
+            for issue in s.issues:
+                # Get issue type (the first two words, before the _number)
+                parts = issue.split('_', 2)
+                issue_counts[f"{parts[0]}_{parts[1]}" if len(parts) > 1 else issue] += 1
         
         # Write report
         timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
@@ -407,7 +459,7 @@ class OBSOutputMonitor:
             if issue_counts:
                 f.write("ISSUES DETECTED:\n")
                 f.write("-"*40 + "\n")
-                for issue_type, count in sorted(issue_counts.items(), key=lambda x: x[1], reverse=True):
+                for issue_type, count in issue_counts.most_common():
                     f.write(f"{issue_type}: {count} times\n")
                 f.write("\n")
             
@@ -455,19 +507,18 @@ class OBSOutputMonitor:
     
     def get_current_status(self) -> Optional[Dict]:
         """Get current OBS output status"""
-        with self.lock:
-            if not self.snapshots:
-                return None
-            
-            latest = self.snapshots[-1]
-            return {
-                'timestamp': latest.timestamp_str,
-                'is_streaming': latest.is_streaming,
-                'active_fps': latest.active_fps,
-                'render_skip_rate': latest.render_skip_rate,
-                'encoding_skip_rate': latest.encoding_skip_rate,
-                'health_score': latest.health_score,
-                'is_degraded': latest.is_degraded,
-                'issues': latest.issues
-            }
+        latest = self._latest
+        if latest is None:
+            return None
+        
+        return {
+            'timestamp': latest.timestamp_str,
+            'is_streaming': latest.is_streaming,
+            'active_fps': latest.active_fps,
+            'render_skip_rate': latest.render_skip_rate,
+            'encoding_skip_rate': latest.encoding_skip_rate,
+            'health_score': latest.health_score,
+            'is_degraded': latest.is_degraded,
+            'issues': latest.issues
+        }
 
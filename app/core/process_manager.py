@@ -21,6 +21,14 @@ from app.core.worker import add_job, JobType
 
 logger = logging.getLogger(__name__)
 
+# Song recognition runs its own asyncio loop on a separate daemon thread, never on the ASGI loop
+SHAZAM_ENABLED = os.environ.get("SHAZAMING") == 'true'
+
+# Seconds between process_queue ticks while a stream is live (health checks, pending source creation)
+QUEUE_POLL_INTERVAL = 3
+# Seconds between ticks with nobody streaming. Queue changes wake the loop straight away.
+QUEUE_IDLE_INTERVAL = 10
+
 
 class Singleton(type):
     _instances = {}
@@ -72,6 +80,10 @@ class StreamManager(metaclass=Singleton):
         # Track pending source creation for streams that aren't publishing yet
         self.pending_source_creation = None  # Stores {rtmp_url, scene_name, stream_key, dj_name, attempts, started_at}
 
+        # Wakes process_queue early when the queue, the lead stream or the swap time changes
+        self._queue_event = threading.Event()
+        self.stream_queue.on_change = self._queue_event.set
+
     def get_rtmp_url(self,stream_key):
         if os.getenv("ENV") == "prod":
             return f"rtmp://{os.getenv("DOMAIN")}:{os.getenv("RTMP_PORT")}/live/{stream_key}"
@@ -102,10 +114,10 @@ class StreamManager(metaclass=Singleton):
         self.stream_health_checker.update_stream_url(rtmp_url)
         
         # PRE-VALIDATION: Check if stream is actually publishing before switching
-        logger.info(f"Validating stream {stream_key} is publishing before switching...")
+        logger.info("Validating stream %s is publishing before switching...", stream_key)
         if not is_stream_publishing(stream_key):
-            logger.warning(f"Stream {stream_key} is NOT currently publishing - deferring source creation")
-            logger.warning(f"Starting recording/timer anyway, will retry when stream comes online")
+            logger.warning("Stream %s is NOT currently publishing - deferring source creation", stream_key)
+            logger.warning("Starting recording/timer anyway, will retry when stream comes online")
             
             # DEFER SOURCE CREATION - store for retry in main loop
             self.pending_source_creation = {
@@ -117,19 +129,19 @@ class StreamManager(metaclass=Singleton):
                 "started_at": time.time()
             }
         else:
-            logger.info(f"Stream {stream_key} confirmed publishing - proceeding with source switch")
+            logger.info("Stream %s confirmed publishing - proceeding with source switch", stream_key)
             # NEW APPROACH: Create a fresh GStreamer source with the new stream's RTMP URL
             # This avoids timestamp inconsistencies and ensures proper buffering before visibility
             add_job(JobType.SWITCH_GSTREAMER_SOURCE, payload={
                 "rtmp_url": rtmp_url,
                 "scene_name": "MOTHERSTREAM"
             })
-            logger.info(f"Enqueued SWITCH_GSTREAMER_SOURCE job with URL: {rtmp_url}")
+            logger.info("Enqueued SWITCH_GSTREAMER_SOURCE job with URL: %s", rtmp_url)
             # Clear any pending state since we succeeded
             self.pending_source_creation = None
         
         add_job(JobType.START_STREAM, payload={"stream_key": stream_key, "dj_name": dj_name})
-        logger.info(f"Enqueued START_STREAM job for DJ: {dj_name} with key: {stream_key}")
+        logger.info("Enqueued START_STREAM job for DJ: %s with key: %s", dj_name, stream_key)
 
         # No need to toggle source visibility - the SWITCH_GSTREAMER_SOURCE handles it
         # The new source will be shown only after it's buffered and ready
@@ -137,6 +149,9 @@ class StreamManager(metaclass=Singleton):
         add_job(JobType.TOGGLE_OBS_SRC, payload={"source_name": "timer", "only_off": False})
         logger.debug("Enqueued TOGGLE_OBS_SRC job (timer on)")
 
+        # New swap deadline and possibly a pending source; let process_queue pick them up now
+        self._queue_event.set()
+
     def switch_stream(self):
         """
         Switch from current streamer to next in queue.
@@ -163,19 +178,19 @@ class StreamManager(metaclass=Singleton):
                 logger.warning("switch_stream called but no current streamer to remove.")
                 return # Nothing to switch from
 
-            logger.debug(f"Switching away from: {old_streamer.dj_name} ({old_streamer.stream_key})")
+            logger.debug("Switching away from: %s (%s)", old_streamer.dj_name, old_streamer.stream_key)
 
             # Stop recording old stream
             add_job(JobType.STOP_RECORDING, payload={"stream_key": old_streamer.stream_key, "dj_name": old_streamer.dj_name})
-            logger.debug(f"Enqueued STOP_RECORDING job for {old_streamer.dj_name}")
+            logger.debug("Enqueued STOP_RECORDING job for %s", old_streamer.dj_name)
 
             # Drop the RTMP publisher so they cannot immediately resume
             add_job(JobType.KICK_PUBLISHER, payload={"stream_key": old_streamer.stream_key})
-            logger.debug(f"Enqueued KICK_PUBLISHER job for {old_streamer.stream_key}")
+            logger.debug("Enqueued KICK_PUBLISHER job for %s", old_streamer.stream_key)
 
             # Send Discord notification for old streamer stopped
             add_job(JobType.SEND_DISCORD_MESSAGE, payload={"message": f"{old_streamer.dj_name} has stopped streaming."}) 
-            logger.debug(f"Enqueued SEND_DISCORD_MESSAGE job for {old_streamer.dj_name} stopped")
+            logger.debug("Enqueued SEND_DISCORD_MESSAGE job for %s stopped", old_streamer.dj_name)
 
             # Reset timer since the stream ended
             self.time_manager = None
@@ -191,10 +206,10 @@ class StreamManager(metaclass=Singleton):
                 current_streamer = self.stream_queue.current_streamer()
             
             if current_streamer:
-                logger.info(f"Switching to new streamer: {current_streamer.dj_name}")
+                logger.info("Switching to new streamer: %s", current_streamer.dj_name)
                 # This call now correctly updates internal state and enqueues START_STREAM job
                 self.start_stream(current_streamer)
-                logger.debug(f"Called start_stream for {current_streamer.dj_name}")
+                logger.debug("Called start_stream for %s", current_streamer.dj_name)
             else:
                 logger.info("No next streamer in queue.")
                 # Disable health checking when queue is empty
@@ -206,7 +221,7 @@ class StreamManager(metaclass=Singleton):
                 # Remove the GStreamer source when queue is empty
                 if self.obs_socket_manager.current_gstreamer_source:
                     add_job(JobType.REMOVE_GSTREAMER_SOURCE, payload={"source_name": self.obs_socket_manager.current_gstreamer_source})
-                    logger.info(f"Enqueued REMOVE_GSTREAMER_SOURCE job for {self.obs_socket_manager.current_gstreamer_source}")
+                    logger.info("Enqueued REMOVE_GSTREAMER_SOURCE job for %s", self.obs_socket_manager.current_gstreamer_source)
 
             logger.info("Stream switch processing complete (jobs enqueued).")
         
@@ -219,7 +234,7 @@ class StreamManager(metaclass=Singleton):
         current_streamer = self.stream_queue.current_streamer()
         if current_streamer:
             unhealthy_duration = self.stream_health_checker.get_unhealthy_duration()
-            logger.error(f"Output stream unhealthy for {unhealthy_duration:.1f}s. Dropping publisher for {current_streamer.dj_name} ({current_streamer.stream_key})")
+            logger.error("Output stream unhealthy for %.1fs. Dropping publisher for %s (%s)", unhealthy_duration, current_streamer.dj_name, current_streamer.stream_key)
             
             # Send Discord notification about the issue
             add_job(JobType.SEND_DISCORD_MESSAGE, payload={
@@ -241,6 +256,8 @@ class StreamManager(metaclass=Singleton):
         if self.time_manager is None:
             self.time_manager = TimeManager()
         self.time_manager.modify_swap_interval(interval=time, reset_time=reset_time)
+        # The swap deadline moved; let process_queue recompute its wait
+        self._queue_event.set()
 
     def set_last_stream_key(self, key: str | None):
         with self._state_lock:
@@ -257,6 +274,14 @@ class StreamManager(metaclass=Singleton):
         with self._state_lock:
             return self._block_last_streamer
 
+    def get_block_state(self) -> tuple[str | None, bool]:
+        """
+        Atomically get the blocking metadata in one lock acquisition.
+        Returns tuple: (last_stream_key, is_blocking_last_streamer)
+        """
+        with self._state_lock:
+            return (self._last_stream_key, self._block_last_streamer)
+
     def toggle_block_previous_client(self) -> bool:
         with self._state_lock:
             self._block_last_streamer = not self._block_last_streamer
@@ -293,7 +318,7 @@ class StreamManager(metaclass=Singleton):
                 if self.loading_message_stop_event.wait(timeout=2):  # Flash every 2 seconds when DJs are queued
                     break  # Stop event was set
             except Exception as e:
-                logger.error(f"Error in loading message flash loop: {e}", exc_info=True)
+                logger.error("Error in loading message flash loop: %s", e, exc_info=True)
                 if self.loading_message_stop_event.wait(timeout=1):  # Brief pause before retrying
                     break
         logger.info("Loading message flash thread stopped.")
@@ -347,13 +372,13 @@ class StreamManager(metaclass=Singleton):
         # VALIDATION 1: Check if this stream is still the lead streamer
         current_lead = self.stream_queue.lead_streamer()
         if current_lead != stream_key:
-            logger.warning(f"Aborting pending source creation for {stream_key} - no longer lead stream (current lead: {current_lead})")
+            logger.warning("Aborting pending source creation for %s - no longer lead stream (current lead: %s)", stream_key, current_lead)
             self.pending_source_creation = None
             return
         
         # VALIDATION 2: Give up after 30 seconds even if still lead
         if elapsed > 10:
-            logger.error(f"Giving up on source creation for {stream_key} after 30s - stream never came online")
+            logger.error("Giving up on source creation for %s after 30s - stream never came online", stream_key)
             self.pending_source_creation = None
             return
         
@@ -361,20 +386,20 @@ class StreamManager(metaclass=Singleton):
         pending["attempts"] += 1
         
         if is_stream_publishing(stream_key):
-            logger.info(f"🎉 Stream {stream_key} now publishing! Creating GSTREAMER source (attempt {pending['attempts']}, after {elapsed:.1f}s)")
+            logger.info("🎉 Stream %s now publishing! Creating GSTREAMER source (attempt %s, after %.1fs)", stream_key, pending['attempts'], elapsed)
             
             add_job(JobType.SWITCH_GSTREAMER_SOURCE, payload={
                 "rtmp_url": pending["rtmp_url"],
                 "scene_name": pending["scene_name"]
             })
-            logger.info(f"Enqueued deferred SWITCH_GSTREAMER_SOURCE job with URL: {pending['rtmp_url']}")
+            logger.info("Enqueued deferred SWITCH_GSTREAMER_SOURCE job with URL: %s", pending['rtmp_url'])
             
             # Clear pending state - success!
             self.pending_source_creation = None
         else:
             # Still waiting - log periodically to show we're still trying
             if pending["attempts"] % 2 == 0:  # Log every ~6 seconds (2 attempts * 3s loop)
-                logger.debug(f"Still waiting for stream {stream_key} to come online (attempt {pending['attempts']}, {elapsed:.1f}s elapsed)")
+                logger.debug("Still waiting for stream %s to come online (attempt %s, %.1fs elapsed)", stream_key, pending['attempts'], elapsed)
 
     # Background thread to manage the stream queue
     def process_queue(self):
@@ -383,14 +408,22 @@ class StreamManager(metaclass=Singleton):
         shazam_thread = None
         if current_streamer:
             # update state variables at startup.
-            logger.info(f"Starting stream from persistent state...: {current_streamer.dj_name}")
+            logger.info("Starting stream from persistent state...: %s", current_streamer.dj_name)
             # self.start_loading_message_thread()
             self.start_stream(current_streamer) 
             logger.info("Done")
+        # Ticks run on a fixed cadence, so the time a tick spends working doesn't stretch the interval
+        next_tick = time.monotonic()
         while True:
 
+            # Bind once per tick; both are referenced several times below
+            health_checker = self.stream_health_checker
+            obs_manager = self.obs_socket_manager
+
             motherstream_state = self.stream_queue.get_stream_key_queue_list()
-            lead_stream = self.stream_queue.lead_streamer()
+            # Lead is the head of the snapshot we just took; no need to lock the queue again
+            lead_stream = motherstream_state[0] if motherstream_state else None
+            last_stream_key, is_blocking = self.get_block_state()
             
             # Create compact state representation
             queue_preview = tuple(motherstream_state[:3])
@@ -398,25 +431,28 @@ class StreamManager(metaclass=Singleton):
                 'lead': lead_stream,
                 'queue_len': len(motherstream_state),
                 'preview': queue_preview,
-                'last': self.get_last_stream_key(),
-                'blocking': self.get_is_blocking_last_streamer()
+                'last': last_stream_key,
+                'blocking': is_blocking
             }
             
             # Only log when state changes (more informative, less spam)
             if current_state != self._last_logged_state:
-                queue_str = f"[{', '.join(motherstream_state[:3])}{'...' if len(motherstream_state) > 3 else ''}]"
-                logger.info(
-                    f"🎵 Queue: Lead={lead_stream or 'None'} | "
-                    f"Queue({len(motherstream_state)})={queue_str} | "
-                    f"Last={current_state['last'] or 'None'} | "
-                    f"{'🔒 BLOCKING' if current_state['blocking'] else '✓ Open'}"
-                )
+                if logger.isEnabledFor(logging.INFO):
+                    queue_str = f"[{', '.join(queue_preview)}{'...' if len(motherstream_state) > 3 else ''}]"
+                    logger.info(
+                        "🎵 Queue: Lead=%s | Queue(%d)=%s | Last=%s | %s",
+                        lead_stream or 'None',
+                        len(motherstream_state),
+                        queue_str,
+                        last_stream_key or 'None',
+                        '🔒 BLOCKING' if is_blocking else '✓ Open',
+                    )
                 self._last_logged_state = current_state
             
             if not lead_stream:
                 # No lead stream - clear any pending source creation
                 if self.pending_source_creation:
-                    logger.info(f"Clearing pending source creation - queue is now empty")
+                    logger.info("Clearing pending source creation - queue is now empty")
                     self.pending_source_creation = None
                 
                 # Only enqueue turn-off jobs once when queue becomes empty
@@ -429,15 +465,17 @@ class StreamManager(metaclass=Singleton):
                         logger.info("Enqueued TOGGLE_OBS_SRC job (gstreamer off) due to no lead stream")
                         
                         # Remove the GStreamer source when queue is empty
-                        if self.obs_socket_manager.current_gstreamer_source:
-                            add_job(JobType.REMOVE_GSTREAMER_SOURCE, payload={"source_name": self.obs_socket_manager.current_gstreamer_source})
-                            logger.info(f"Enqueued REMOVE_GSTREAMER_SOURCE job for {self.obs_socket_manager.current_gstreamer_source}")
+                        # Read once: the worker thread can change it between checks
+                        gstreamer_source = obs_manager.current_gstreamer_source
+                        if gstreamer_source:
+                            add_job(JobType.REMOVE_GSTREAMER_SOURCE, payload={"source_name": gstreamer_source})
+                            logger.info("Enqueued REMOVE_GSTREAMER_SOURCE job for %s", gstreamer_source)
                         
                         self.obs_turned_off_for_empty_queue = True
                     else:
                         logger.debug("Skipping GMOTHERSTREAM turn off - stream switch in progress")
                 # Reset health checker when no stream is active
-                self.stream_health_checker.reset()
+                health_checker.reset()
             else:
                 # Reset flag when we have a lead stream
                 self.obs_turned_off_for_empty_queue = False
@@ -450,29 +488,44 @@ class StreamManager(metaclass=Singleton):
                 # 1. Health checking is enabled (stream is active and connected)
                 # 2. No check is already in progress
                 # This prevents queue buildup and checks on disconnected streams
-                if self.stream_health_checker.enabled and not self.stream_health_checker.is_check_in_progress():
+                if health_checker.enabled and not health_checker.is_check_in_progress():
                     add_job(JobType.CHECK_STREAM_HEALTH, payload={
-                        "stream_url": self.stream_health_checker.stream_url,
-                        "health_checker": self.stream_health_checker
+                        "stream_url": health_checker.stream_url,
+                        "health_checker": health_checker
                     })
                 
                 # Check if stream has been unhealthy for too long (only if enabled)
-                if self.stream_health_checker.enabled and self.stream_health_checker.is_unhealthy_for_threshold():
+                if health_checker.enabled and health_checker.is_unhealthy_for_threshold():
                     self.handle_unhealthy_stream()
             
             # oryx_state = get_stream_state()
             
             if self.time_manager and self.time_manager.has_swap_interval_elapsed():
-                logger.debug(f"Swap interval of {self.time_manager.get_swap_interval()} seconds elapsed, stopping current stream.")
+                logger.debug("Swap interval of %s seconds elapsed, stopping current stream.", self.time_manager.get_swap_interval())
                 self.switch_stream()
-            # Polling sleep time
-            time.sleep(3) 
+            # Wait for the next tick, the swap deadline or a wake-up, whichever comes first
+            next_tick += QUEUE_POLL_INTERVAL if lead_stream else QUEUE_IDLE_INTERVAL
+            now = time.monotonic()
+            if next_tick < now:
+                # Fell behind (e.g. a slow switch); run the next tick right away instead of bursting
+                next_tick = now
+            wake_at = next_tick
+            time_manager = self.time_manager
+            if time_manager and lead_stream:
+                # 0 means the swap is already due but didn't happen (switch in progress); stay on the cadence
+                remaining = time_manager.get_remaining_time()
+                if remaining > 0:
+                    wake_at = min(wake_at, now + remaining)
+            if self._queue_event.wait(wake_at - now):
+                self._queue_event.clear()
+                # Woken by a change; the cadence restarts from this tick
+                next_tick = time.monotonic()
             
-            if os.environ.get("SHAZAMING") == 'true':
+            if SHAZAM_ENABLED:
                 if shazam_thread is None or not shazam_thread.is_alive():
                     # logger.info("Attempting to restart song recognition thread")
                     song_recognizer = SongRecognizer()
-                    shazam_thread = threading.Thread(target=song_recognizer.recognize_song_full, daemon=True)
+                    shazam_thread = threading.Thread(target=song_recognizer.recognize_song_full, name="ShazamProbe", daemon=True)
                     shazam_thread.start()
                 else:
                     # logger.info("Shazam thread is still kicking!")
@@ -22,6 +22,8 @@ class StreamQueue(metaclass=Singleton):
 
     stream_queue = []
     queue_file_path = Path(os.getcwd()) / 'QUEUE.json'
+    # Optional callable run after every queue change (StreamManager uses it to wake process_queue)
+    on_change = None
 
 
     def __init__(self, saved_state=[]):
@@ -30,8 +32,9 @@ class StreamQueue(metaclass=Singleton):
          # Reload the queue object in the event of server shutdown during stream
         self.persist_queue()
     
-    def get_full_user_object(self,user_id):
-        db = next(get_db())
+    def get_full_user_object(self,user_id,db=None):
+        if db is None:
+            db = next(get_db())
         return get_user(db,user_id)
     
     def get_full_user_object_with_stream_key(self,stream_key):
@@ -68,6 +71,18 @@ class StreamQueue(metaclass=Singleton):
             else:
                 return None
 
+    def is_lead(self, stream_key) -> bool:
+        # Lock-free: indexing the list is a single atomic read under the GIL. Callers that
+        # need the answer to stay true while they act on it already hold queue_lock.
+        try:
+            return self.stream_queue[0].stream_key == stream_key
+        except IndexError:
+            return False
+
+    def _notify_change(self):
+        if self.on_change is not None:
+            self.on_change()
+
         # save updated queue state to persistent store.
     def _write_persistent_state(self):
         try:
@@ -86,11 +101,13 @@ class StreamQueue(metaclass=Singleton):
         with queue_lock:
             self.stream_queue.append(user)
         self._write_persistent_state()
+        self._notify_change()
 
     def unqueue_client_stream(self):
         with queue_lock:
             last_user = self.stream_queue.pop(0)
         self._write_persistent_state()
+        self._notify_change()
         return last_user
     
     def remove_client_with_stream_key(self,stream_key):
@@ -102,16 +119,37 @@ class StreamQueue(metaclass=Singleton):
                     if user.stream_key == stream_key:
                         self.stream_queue.pop(i)
                         removed = True
-                        logger.debug(f"Successfully removed client with stream key {stream_key} from queue")
+                        logger.debug("Successfully removed client with stream key %s from queue", stream_key)
                         break
                 if not removed:
-                    logger.debug(f"No client found with stream key {stream_key} in queue")
+                    logger.debug("No client found with stream key %s in queue", stream_key)
             
             if removed:
                 self._write_persistent_state()
+                self._notify_change()
         except Exception as e:
             logger.exception(f"Error removing client from queue: {e}")
 
+    def remove_client_unless_lead(self, stream_key) -> bool:
+        """
+        Atomically remove stream_key from the queue unless it is the lead.
+        Returns True if stream_key is the lead (and was left in place).
+        """
+        with queue_lock:
+            for i, user in enumerate(self.stream_queue):
+                if user.stream_key == stream_key:
+                    if i == 0:
+                        return True
+                    self.stream_queue.pop(i)
+                    break
+            else:
+                logger.debug("No client found with stream key %s in queue", stream_key)
+                return False
+        self._write_persistent_state()
+        self._notify_change()
+        logger.debug("Successfully removed client with stream key %s from queue", stream_key)
+        return False
+
     def queue_client_stream_if_not_exists(self, user: User) -> bool:
         """
         Atomically check if stream key exists and add if not.
@@ -121,14 +159,28 @@ class StreamQueue(metaclass=Singleton):
             # Check if already in queue
             for existing_user in self.stream_queue:
                 if existing_user.stream_key == user.stream_key:
-                    logger.debug(f"Stream key {user.stream_key} already in queue")
+                    logger.debug("Stream key %s already in queue", user.stream_key)
                     return False
             # Not in queue, add it
             self.stream_queue.append(user)
         self._write_persistent_state()
-        logger.debug(f"Added {user.stream_key} to queue")
+        self._notify_change()
+        logger.debug("Added %s to queue", user.stream_key)
         return True
 
+    def try_claim_lead(self, user: User, allow_lead: bool = True):
+        """
+        Atomically queue user if their stream key isn't already present.
+        If the queue is empty and allow_lead is False, the user is not added.
+        Returns tuple: (was_added, lead_stream_key) with the lead after the call,
+        lead_stream_key is None only when the user was refused the empty lead slot.
+        """
+        with queue_lock:
+            if not self.stream_queue and not allow_lead:
+                return (False, None)
+            was_added = self.queue_client_stream_if_not_exists(user)
+            return (was_added, self.stream_queue[0].stream_key)
+
     def get_lead_streamer_info(self):
         """
         Atomically get lead streamer info.
@@ -151,14 +203,23 @@ class StreamQueue(metaclass=Singleton):
             if os.path.exists(self.queue_file_path):
                 with self.queue_file_path.open('r') as queue_file:
                     users = json.load(queue_file)
+                if not users:
+                    return
+                # One session for the whole restore rather than one per saved user
+                db_gen = get_db()
+                db = next(db_gen)
+                try:
                     for user_id in users:
-                        user_object = self.get_full_user_object(int(user_id))
+                        user_object = self.get_full_user_object(int(user_id), db)
                         if user_object:
                             self.stream_queue.append(user_object)
                         else:
                             logger.error("Error finding user in stream queue.")
+                finally:
+                    # Hand the connection back to the pool now rather than whenever the session is collected
+                    db_gen.close()
         except json.JSONDecodeError as e:
-            logger.debug(f"Error reading input file: {e}")
+            logger.debug("Error reading input file: %s", e)
         except Exception as e:
             logger.exception(e)
 
@@ -12,7 +12,20 @@ class TimeManager():
     stream_start_time = None
 
     def __init__(self):
-        self.stream_start_time = time.time() 
+        # Monotonic so NTP steps or wall-clock changes can't cut a set short or extend it
+        self.stream_start_time = time.monotonic()
+        self._update_deadline()
+
+    def _update_deadline(self):
+        # The deadline only moves when the start time or interval changes, so don't redo the sum per check.
+        # Remember which interval it was built from since swap_interval is shared across instances.
+        self._deadline_interval = swap_interval
+        self._deadline = None if self.stream_start_time is None else self.stream_start_time + swap_interval
+
+    def _get_deadline(self):
+        if self._deadline_interval != swap_interval:
+            self._update_deadline()
+        return self._deadline
 
     def get_swap_interval(self):
         global swap_interval
@@ -20,24 +33,30 @@ class TimeManager():
     
     # Helper function to check if the swap interval has elapsed
     def has_swap_interval_elapsed(self):
-        if self.stream_start_time is None:
+        deadline = self._get_deadline()
+        if deadline is None:
             return False
-        return (time.time() - self.stream_start_time) >= swap_interval
+        return time.monotonic() >= deadline
     
     def modify_swap_interval(self, interval, reset_time=False):
+        global swap_interval
         try:
-            global swap_interval
-            swap_interval = int(interval)
-            if reset_time:
-                self.stream_start_time = time.time()
-            logger.info(f"Changed swap interval to {interval}.")
+            new_interval = int(interval)
         except (ValueError, TypeError) as e:
             logger.info(f"Failed to change swap interval. Invalid value given: {interval}. Error: {str(e)}")
+            return
+        if new_interval <= 0:
+            logger.info(f"Failed to change swap interval. Interval must be positive, got {interval}.")
+            return
+
+        swap_interval = new_interval
+        if reset_time:
+            self.stream_start_time = time.monotonic()
+        self._update_deadline()
+        logger.info(f"Changed swap interval to {interval}.")
             
     def get_remaining_time(self):
-        global swap_interval
-        if self.stream_start_time is None:
+        deadline = self._get_deadline()
+        if deadline is None:
             return swap_interval
-        elapsed_time = time.time() - self.stream_start_time
-        remaining_time = swap_interval - elapsed_time
-        return max(0, remaining_time)  # Ensure no negative time
\ No newline at end of file
+        return max(0, deadline - time.monotonic())  # Ensure no negative time
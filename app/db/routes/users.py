@@ -6,6 +6,7 @@ from .. import schemas, crud, models
 from ..security import get_current_user, ph
 from ..main import get_db
 from ..email import send_welcome_email
+from ..validation import invalidate as invalidate_cached_user
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +23,9 @@ def edit_user(user_id: int, db:Session = Depends(get_db)):
     db_user = crud.get_user(db, user_id=user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return crud.edit_user(db=db,user=db_user)
+    edited_user = crud.edit_user(db=db,user=db_user)
+    invalidate_cached_user(db_user.stream_key)
+    return edited_user
 
 @user_router.get("/api/v1/users/me", response_model=schemas.User)
 def read_user_me(current_user: schemas.User = Depends(get_current_user)):
@@ -30,12 +33,20 @@ def read_user_me(current_user: schemas.User = Depends(get_current_user)):
 
 @user_router.delete("/api/v1/users/me", response_model=schemas.Message)
 def delete_user_me(current_user: schemas.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    # Read before deleting: the row's attributes can't be loaded once it's gone
+    stream_key = current_user.stream_key
     crud.delete_user(db, user_id=current_user.id)
+    invalidate_cached_user(stream_key)
     return {"message": "User deleted successfully"}
 
 @user_router.patch("/api/v1/users/me", response_model=schemas.User)
 def update_user_me(user_update: schemas.UserUpdateMe, current_user: schemas.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    old_stream_key = current_user.stream_key
     updated_user = crud.update_user_me(db, user_id=current_user.id, user_update=user_update)
+    # The stream key may have changed: drop the entry for the old key and any stale one for the new key
+    invalidate_cached_user(old_stream_key)
+    if updated_user and updated_user.stream_key != old_stream_key:
+        invalidate_cached_user(updated_user.stream_key)
     return updated_user
 
 @user_router.patch("/api/v1/users/me/password", response_model=schemas.Message)
@@ -91,6 +102,7 @@ def update_user(user_id: int, user_update: schemas.UserUpdateMe, db: Session = D
         db_user.profile_picture = user_update.profile_picture or None
     # TODO: More logic
     db.commit()
+    invalidate_cached_user(db_user.stream_key)
     db.refresh(db_user)
     return schemas.User.model_validate(db_user)
 
@@ -99,5 +111,8 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
     db_user = crud.get_user(db, user_id=user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
+    # Read before deleting: the row's attributes can't be loaded once it's gone
+    stream_key = db_user.stream_key
     crud.delete_user(db, user_id=user_id)
+    invalidate_cached_user(stream_key)
     return {"message": "User deleted successfully"}
\ No newline at end of file
@@ -1,23 +1,78 @@
-
 from .crud import get_user_by_stream_key
 from .main import get_db
+import hashlib
 import logging
 import re
-from fastapi import Depends
+import threading
+import time
 logger = logging.getLogger(__name__)
 
-def ensure_valid_user(stream_key: str):
+# RTMP clients reconnect often while the set of valid stream keys changes on human timescales,
+# so cache lookups briefly instead of hitting the DB on every on_publish.
+USER_CACHE_TTL = 30          # seconds a valid user stays cached
+USER_CACHE_NEGATIVE_TTL = 5  # keep misses short so newly created users aren't locked out
+USER_CACHE_MAXSIZE = 4096
+
+# \Z rather than $ so a trailing newline can't slip through
+STREAM_KEY_RE = re.compile(r'\A[A-Za-z0-9_-]+\Z')
+
+def is_valid_stream_key(stream_key: str) -> bool:
+    # Generated keys are plain ASCII letters and digits, which two C-level str checks settle
+    # without the regex. Custom keys with '_' or '-' fall through to it.
+    return (stream_key.isascii() and stream_key.isalnum()) or STREAM_KEY_RE.match(stream_key) is not None
+
+_user_cache = {}  # hashed stream key -> (expires_at, user or None)
+_user_cache_lock = threading.Lock()
+
+def _cache_key(stream_key: str) -> str:
+    # Stream keys are effectively bearer tokens, so don't keep them in memory as-is
+    return hashlib.blake2b(stream_key.encode(), digest_size=16).hexdigest()
+
+def _cache_user(stream_key: str, user):
+    ttl = USER_CACHE_TTL if user else USER_CACHE_NEGATIVE_TTL
+    with _user_cache_lock:
+        if len(_user_cache) >= USER_CACHE_MAXSIZE:
+            # Dicts keep insertion order, so this drops the oldest entry
+            _user_cache.pop(next(iter(_user_cache)))
+        _user_cache[_cache_key(stream_key)] = (time.monotonic() + ttl, user)
+
+def invalidate(stream_key: str | None):
+    """Drop a cached lookup, e.g. after the user is deleted or their stream key changes."""
+    if not stream_key:
+        return
+    with _user_cache_lock:
+        _user_cache.pop(_cache_key(stream_key), None)
+
+def clear_user_cache():
+    with _user_cache_lock:
+        _user_cache.clear()
+
+def ensure_valid_user(stream_key: str, db=None):
+    """
+    Look up the user for a stream key, or None if it's unknown.
+    Pass db to reuse a session the caller already holds; otherwise one is opened only on a cache miss.
+    """
 
-    db = next(get_db())
     if not stream_key:
         return None
         # Sanitize stream_key
-    if not re.match(r'^[A-Za-z0-9_-]+$', stream_key):
+    if not is_valid_stream_key(stream_key):
         logger.exception(f"Invalid stream name: {stream_key}")
-        raise Exception(f"Invalid stream name. Not allowing validation stream.") 
+        raise Exception(f"Invalid stream name. Not allowing validation stream.")
         return None
+
+    with _user_cache_lock:
+        cached = _user_cache.get(_cache_key(stream_key))
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    db_gen = None
+    if db is None:
+        db_gen = get_db()
+        db = next(db_gen)
     try:
         user = get_user_by_stream_key(db=db,stream_key=stream_key)
+        _cache_user(stream_key, user)
         if user:
             return user
         else:
@@ -25,3 +80,7 @@ def ensure_valid_user(stream_key: str):
     except Exception as e:
         logger.exception(f"Error getting user: {e}")
         return None
+    finally:
+        # Hand the connection back to the pool now rather than whenever the session is collected
+        if db_gen is not None:
+            db_gen.close()
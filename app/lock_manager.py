@@ -1,6 +1,12 @@
 import threading
 
+try:
+    # Cython RLock; much cheaper than threading.RLock when uncontended, which is the common case for RTMP callbacks
+    from fastrlock.rlock import FastRLock as _RLock
+except ImportError:
+    _RLock = threading.RLock
+
 # Use RLock (reentrant lock) for queue operations to allow nested locking by the same thread
-lock = threading.RLock()
+lock = _RLock()
 
-obs_lock = threading.Lock()
\ No newline at end of file
+obs_lock = threading.Lock()
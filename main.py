@@ -5,6 +5,7 @@ from contextlib import asynccontextmanager
 from starlette.middleware import Middleware
 from starlette.middleware.cors import CORSMiddleware
 import subprocess
+import atexit
 import logging
 import os
 
@@ -16,6 +17,13 @@ from app.core.process_manager import StreamManager
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# logging_config.yml sends the root logger through a QueueHandler so the stream manager and monitor
+# threads don't block on stderr. Its listener isn't started by dictConfig, so start it here.
+queue_handler = logging.getHandlerByName('queue')
+if queue_handler is not None:
+    queue_handler.listener.start()
+    atexit.register(queue_handler.listener.stop)
+
 try:
     import debugpy
     debug_port: int = os.environ.get('DEBUG_PORT',5555)
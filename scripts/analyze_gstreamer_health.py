@@ -27,10 +27,10 @@ except ImportError:
     sys.exit(1)
 
 try:
-    import pandas as pd
+    import numpy
 except ImportError:
-    print("❌ Error: pandas not installed")
-    print("   Install with: pip install pandas")
+    print("❌ Error: numpy not installed")
+    print("   Install with: pip install numpy")
     sys.exit(1)
 
 
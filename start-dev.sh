@@ -2,4 +2,4 @@
 
 LOG_LEVEL=debug \
 opentelemetry-instrument \
-uvicorn main:app --host 0.0.0.0 --port 8483 --reload-exclude '**/*.log' --log-level debug
\ No newline at end of file
+uvicorn main:app --host 0.0.0.0 --port 8483 --loop uvloop --http httptools --reload-exclude '**/*.log' --log-level debug
\ No newline at end of file
@@ -1,3 +1,3 @@
 #!/bin/bash
 
-LOG_LEVEL=info uvicorn main:app --host 0.0.0.0 --port 8483 --log-config=logging_config.yml
\ No newline at end of file
+LOG_LEVEL=info uvicorn main:app --host 0.0.0.0 --port 8483 --loop uvloop --http httptools --log-config=logging_config.yml
\ No newline at end of file
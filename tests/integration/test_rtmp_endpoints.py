@@ -174,6 +174,46 @@ class TestOnForwardConcurrency:
         assert len(set(results)) == 1, f"Results should be consistent: {results}"
 
 
+@pytest.mark.integration
+class TestOnForwardStaysInMemory:
+    """on_forward is the hottest callback and must never reach the database."""
+    
+    @pytest.mark.parametrize("is_lead", [True, False])
+    def test_on_forward_never_validates_user(self, test_client, clean_queue, mock_user, monkeypatch, is_lead):
+        def fail_validation(*args, **kwargs):
+            raise AssertionError("on_forward must not call ensure_valid_user")
+        
+        monkeypatch.setattr('app.api.rtmp_endpoints.ensure_valid_user', fail_validation)
+        if is_lead:
+            clean_queue.stream_queue = [mock_user]
+        
+        with patch('app.api.rtmp_endpoints.process_manager.stream_queue', clean_queue):
+            with patch.object(clean_queue, 'get_full_user_object_with_stream_key', side_effect=AssertionError("DB lookup")):
+                response = test_client.post(
+                    "/",
+                    json={"action": "on_forward", "stream": mock_user.stream_key, "app": "live"}
+                )
+        
+        assert response.status_code == 200
+        assert "urls" in response.json()["data"]
+
+
+@pytest.mark.integration
+class TestUnpublishInvalidatesUserCache:
+    """A disconnect should force the next on_publish to re-validate the stream key."""
+    
+    def test_on_unpublish_invalidates_cached_user(self, test_client, clean_queue, mock_user):
+        with patch('app.api.rtmp_endpoints.process_manager.stream_queue', clean_queue):
+            with patch('app.api.rtmp_endpoints.invalidate_cached_user') as invalidate:
+                response = test_client.post(
+                    "/",
+                    json={"action": "on_unpublish", "stream": mock_user.stream_key, "app": "live"}
+                )
+        
+        assert response.status_code == 200
+        invalidate.assert_called_once_with(mock_user.stream_key)
+
+
 @pytest.mark.integration
 class TestBlockingMechanism:
     """Ensure recently removed leads can be temporarily blocked."""
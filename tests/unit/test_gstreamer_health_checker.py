@@ -0,0 +1,105 @@
+"""Unit tests for GStreamerHealthChecker class."""
+import pytest
+from unittest.mock import patch
+
+from app.core.gstreamer_health_checker import GStreamerHealthChecker
+
+PLAYING = "OBS_MEDIA_STATE_PLAYING"
+
+
+def check_at(checker, now, media_time, media_state=PLAYING, obs_fps=30.0):
+    with patch('app.core.gstreamer_health_checker.time.monotonic', return_value=now):
+        return checker.check_health(media_state, media_time, obs_fps, is_visible=True)
+
+
+@pytest.mark.unit
+class TestMediaTimeProgress:
+    """Test stall detection and effective framerate."""
+
+    def test_steady_playback_is_healthy(self):
+        checker = GStreamerHealthChecker()
+        for i in range(5):
+            status = check_at(checker, 1000.0 + i, i * 1000)
+
+        assert status.is_healthy
+        assert status.health_score == 100.0
+        assert status.media_time_progressing
+        assert status.issues == []
+
+    def test_effective_framerate_uses_last_ten_samples(self):
+        checker = GStreamerHealthChecker()
+        media_time = 0
+        check_at(checker, 1000.0, media_time)
+        # Half speed for the first samples, then real time. Only the last 10 should count.
+        for i in range(1, 16):
+            media_time += 500 if i <= 5 else 1000
+            status = check_at(checker, 1000.0 + i, media_time, obs_fps=60.0)
+
+        # Media time ran 1:1 over that window, so the effective rate is the OBS rate
+        assert status.effective_framerate == pytest.approx(60.0)
+
+    def test_stall_is_reported_and_recovers(self):
+        checker = GStreamerHealthChecker()
+        check_at(checker, 1000.0, 5000)
+        check_at(checker, 1001.0, 6000)
+        check_at(checker, 1002.0, 6000)
+        status = check_at(checker, 1004.5, 6000)
+
+        assert not status.media_time_progressing
+        assert status.media_time_stall_duration == pytest.approx(2.5)
+        assert status.buffer_underrun_likely
+        assert "CRITICAL_MEDIA_STALL_2.5s" in status.issues
+        assert checker.get_diagnostics()['currently_stalled']
+
+        status = check_at(checker, 1005.5, 7000)
+        assert status.media_time_progressing
+        assert not checker.get_diagnostics()['currently_stalled']
+
+    def test_stall_count_only_covers_last_minute(self):
+        checker = GStreamerHealthChecker()
+        check_at(checker, 1000.0, 1000)
+        for i in range(1, 8):
+            status = check_at(checker, 1000.0 + i, 1000)
+        assert status.stall_count_last_minute == 7
+        assert "FREQUENT_STALLS_7/min" in status.issues
+
+        # The first three stalls (t=1001..1003) are now a minute old
+        status = check_at(checker, 1063.0, 1000)
+        assert status.stall_count_last_minute == 5
+        assert checker.get_diagnostics()['stalls_last_minute'] == 5
+
+    @pytest.mark.parametrize("media_state,warning", [
+        ("OBS_MEDIA_STATE_BUFFERING", "PIPELINE_BUFFERING_BUT_PROGRESSING"),
+        ("OBS_MEDIA_STATE_PAUSED", "PIPELINE_STATE_OBS_MEDIA_STATE_PAUSED_BUT_PROGRESSING"),
+    ])
+    def test_non_playing_state_is_labelled(self, media_state, warning):
+        checker = GStreamerHealthChecker()
+        check_at(checker, 1000.0, 1000)
+        status = check_at(checker, 1001.0, 2000, media_state=media_state)
+
+        assert status.warnings == [warning]
+        assert status.is_healthy
+
+    def test_recent_stalls_still_counted_once_playback_is_steady(self):
+        checker = GStreamerHealthChecker()
+        check_at(checker, 1000.0, 1000)
+        check_at(checker, 1001.0, 1000)
+        check_at(checker, 1002.0, 2000)
+        status = check_at(checker, 1003.0, 3000)
+
+        assert status.stall_count_last_minute == 1
+        assert status.is_healthy
+
+    def test_no_source_reporting_is_healthy(self):
+        checker = GStreamerHealthChecker()
+        status = check_at(checker, 1000.0, None, media_state=None)
+
+        assert status.is_healthy
+        assert status.effective_framerate is None
+        assert checker.get_diagnostics()['consecutive_healthy_checks'] == 1
+
+        # Playback picks up from nothing without reporting a stall or jitter
+        check_at(checker, 1001.0, 1000)
+        status = check_at(checker, 1002.0, 2000)
+        assert status.is_healthy
+        assert status.warnings == []
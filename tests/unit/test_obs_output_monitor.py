@@ -0,0 +1,147 @@
+"""Unit tests for OBSOutputMonitor class."""
+import csv
+import glob
+import os
+import time
+
+import pytest
+from unittest.mock import Mock
+
+from app.core.obs_output_monitor import OBSOutputMonitor, OBSOutputSnapshot
+
+
+@pytest.fixture
+def obs_manager():
+    manager = Mock()
+    manager.get_stats.return_value = {
+        'activeFps': 30.0,
+        'averageFrameRenderTime': 10.0,
+        'outputBytes': 0,
+    }
+    manager.get_output_status.return_value = {'outputActive': True}
+    return manager
+
+
+def wait_for_snapshots(monitor, count, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while len(monitor.snapshots) < count:
+        assert time.monotonic() < deadline, "monitor didn't collect enough snapshots"
+        time.sleep(0.005)
+
+
+def read_rows(log_dir):
+    [csv_path] = glob.glob(os.path.join(log_dir, "obs-output-*.csv"))
+    with open(csv_path, newline='') as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.mark.unit
+class TestCsvLogging:
+    """Test that snapshots reach the CSV log."""
+
+    def test_rows_flushed_while_running(self, obs_manager, tmp_path):
+        monitor = OBSOutputMonitor(obs_manager, log_dir=str(tmp_path), poll_interval=0.001)
+        monitor.CSV_FLUSH_INTERVAL = 0
+        monitor.start_monitoring()
+        try:
+            wait_for_snapshots(monitor, 3)
+            assert len(read_rows(tmp_path)) >= 2
+        finally:
+            monitor.stop_monitoring()
+
+    def test_stop_writes_remaining_rows(self, obs_manager, tmp_path):
+        monitor = OBSOutputMonitor(obs_manager, log_dir=str(tmp_path), poll_interval=0.001)
+        monitor.start_monitoring()
+        wait_for_snapshots(monitor, 3)
+        monitor.stop_monitoring()
+
+        rows = read_rows(tmp_path)
+        assert len(rows) == len(monitor.snapshots)
+        assert rows[0]['active_fps'] == '30.0'
+        assert rows[0]['output_duration'] == '0'
+
+    def test_issues_joined_into_one_column(self, obs_manager, tmp_path):
+        obs_manager.get_stats.return_value = {'activeFps': 20.0, 'averageFrameRenderTime': 60.0}
+        monitor = OBSOutputMonitor(obs_manager, log_dir=str(tmp_path), poll_interval=0.001)
+        monitor.start_monitoring()
+        wait_for_snapshots(monitor, 1)
+        monitor.stop_monitoring()
+
+        row = read_rows(tmp_path)[0]
+        assert row['issues'] == "CRITICAL_LOW_FPS_20.0; CRITICAL_SLOW_RENDERING_60.0ms"
+        assert row['is_degraded'] == 'True'
+        assert row['cpu_usage'] == ''
+
+
+@pytest.mark.unit
+class TestCurrentStatus:
+    """Test get_current_status."""
+
+    def test_none_before_first_snapshot(self, obs_manager, tmp_path):
+        monitor = OBSOutputMonitor(obs_manager, log_dir=str(tmp_path))
+        assert monitor.get_current_status() is None
+
+    def test_reports_latest_snapshot(self, obs_manager, tmp_path):
+        monitor = OBSOutputMonitor(obs_manager, log_dir=str(tmp_path), poll_interval=0.001)
+        monitor.start_monitoring()
+        wait_for_snapshots(monitor, 2)
+        monitor.stop_monitoring()
+
+        status = monitor.get_current_status()
+        assert status['timestamp'] == monitor.snapshots[-1].timestamp_str
+        assert status['active_fps'] == 30.0
+        assert status['is_streaming']
+
+
+@pytest.mark.unit
+class TestStopMonitoring:
+    """Test that stopping doesn't wait out the poll interval."""
+
+    def test_stop_interrupts_poll_wait(self, obs_manager, tmp_path):
+        monitor = OBSOutputMonitor(obs_manager, log_dir=str(tmp_path), poll_interval=30.0)
+        monitor.start_monitoring()
+        wait_for_snapshots(monitor, 1)
+
+        started = time.monotonic()
+        monitor.stop_monitoring()
+
+        assert time.monotonic() - started < 1.0
+        assert not monitor.monitor_thread.is_alive()
+
+
+def make_snapshot(timestamp, active_fps=None, average_frame_time=None, render_skip_rate=None, issues=()):
+    return OBSOutputSnapshot(
+        timestamp=timestamp, timestamp_str=str(timestamp), active_fps=active_fps,
+        average_frame_time=average_frame_time, render_skipped_frames=0, render_total_frames=0,
+        output_skipped_frames=0, output_total_frames=0, output_bytes=0, output_duration=0,
+        render_skip_rate=render_skip_rate, encoding_skip_rate=None, current_bitrate_mbps=None,
+        cpu_usage=None, memory_usage=None, is_streaming=True, health_score=100.0,
+        issues=list(issues), is_degraded=bool(issues),
+    )
+
+
+@pytest.mark.unit
+class TestReport:
+    """Test the summary report written on stop."""
+
+    def test_summary_skips_missing_values(self, obs_manager, tmp_path):
+        monitor = OBSOutputMonitor(obs_manager, log_dir=str(tmp_path))
+        monitor.snapshots.extend([
+            make_snapshot(1000.0, active_fps=30.0, average_frame_time=10.0, render_skip_rate=-1.0),
+            make_snapshot(1002.0, active_fps=20.0, render_skip_rate=6.0, issues=["CRITICAL_LOW_FPS_20.0"]),
+            make_snapshot(1004.0, average_frame_time=30.0),
+        ])
+        monitor._generate_report()
+
+        [report_path] = glob.glob(os.path.join(tmp_path, "obs-output-report-*.txt"))
+        with open(report_path) as f:
+            report = f.read()
+        assert "Monitoring Duration: 4.0 seconds" in report
+        assert "Degraded Snapshots: 1 (33.3%)" in report
+        assert "Average FPS: 25.00" in report
+        assert "Minimum FPS: 20.00" in report
+        assert "Average Frame Time: 20.00ms" in report
+        assert "Maximum Frame Time: 30.00ms" in report
+        assert "Peak Render Skip Rate: 6.00 fps" in report
+        assert "Peak Encoding Skip Rate: 0.00 fps" in report
+        assert "CRITICAL_LOW: 1 times" in report
@@ -146,6 +146,14 @@ class TestStateAccessors:
         assert clean_stream_manager.should_block_streamer("RECENT") is True
         assert clean_stream_manager.should_block_streamer("OTHER") is False
 
+    def test_get_block_state(self, clean_stream_manager):
+        clean_stream_manager.set_block_previous_client(True)
+        clean_stream_manager.set_last_stream_key("RECENT")
+        assert clean_stream_manager.get_block_state() == ("RECENT", True)
+        clean_stream_manager.clear_last_stream_key()
+        clean_stream_manager.set_block_previous_client(False)
+        assert clean_stream_manager.get_block_state() == (None, False)
+
 
 @pytest.mark.unit
 class TestSwitchStreamLogic:
@@ -219,3 +227,23 @@ class TestSwitchStreamLogic:
         clean_stream_manager.stream_health_checker.disable.assert_called_once()
         assert clean_stream_manager.get_last_stream_key() == "OLD_KEY"
 
+
+
+@pytest.mark.unit
+class TestQueueWakeup:
+    """Test that changes wake process_queue instead of waiting for the next tick."""
+
+    def test_queue_change_wakes_loop(self, clean_stream_manager, clean_queue, mock_user):
+        assert not clean_stream_manager._queue_event.is_set()
+
+        with patch.object(clean_queue, '_write_persistent_state'):
+            clean_queue.queue_client_stream(mock_user)
+
+        assert clean_stream_manager._queue_event.is_set()
+
+    def test_swap_time_change_wakes_loop(self, clean_stream_manager, monkeypatch):
+        # swap_interval is module-global; monkeypatch puts it back afterwards
+        monkeypatch.setattr('app.core.time_manager.swap_interval', 3600)
+        clean_stream_manager.modify_swap_time(60)
+
+        assert clean_stream_manager._queue_event.is_set()
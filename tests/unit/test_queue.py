@@ -211,6 +211,116 @@ class TestCurrentStreamer:
         assert result.stream_key == "TEST_KEY_123"
 
 
+@pytest.mark.unit
+class TestIsLead:
+    """Test the is_lead method."""
+    
+    def test_empty_queue_has_no_lead(self, clean_queue):
+        """Nothing is lead in an empty queue."""
+        assert clean_queue.is_lead("TEST_KEY_123") is False
+    
+    def test_only_head_is_lead(self, clean_queue, mock_user_factory):
+        """Only the first stream key in the queue should be reported as lead."""
+        users = [mock_user_factory(i) for i in range(3)]
+        with patch.object(clean_queue, '_write_persistent_state'):
+            clean_queue.stream_queue.extend(users)
+        
+        assert clean_queue.is_lead("TEST_KEY_0") is True
+        assert clean_queue.is_lead("TEST_KEY_1") is False
+    
+    @pytest.mark.timeout(3)
+    def test_is_lead_does_not_wait_for_queue_lock(self, clean_queue, mock_user):
+        """on_forward's lead check must not block behind another thread holding queue_lock."""
+        from app.lock_manager import lock as queue_lock
+        with patch.object(clean_queue, '_write_persistent_state'):
+            clean_queue.stream_queue.append(mock_user)
+        
+        holding = threading.Event()
+        release = threading.Event()
+        
+        def hold_lock():
+            with queue_lock:
+                holding.set()
+                release.wait(2)
+        
+        t = threading.Thread(target=hold_lock)
+        t.start()
+        holding.wait(1)
+        try:
+            assert clean_queue.is_lead("TEST_KEY_123") is True
+        finally:
+            release.set()
+            t.join()
+
+
+@pytest.mark.unit
+class TestTryClaimLead:
+    """Test the atomic claim used by on_publish."""
+    
+    def test_first_user_claims_lead(self, clean_queue, mock_user):
+        """First user into an empty queue becomes lead."""
+        with patch.object(clean_queue, '_write_persistent_state'):
+            result = clean_queue.try_claim_lead(mock_user)
+        
+        assert result == (True, "TEST_KEY_123")
+    
+    def test_blocked_user_not_added_to_empty_queue(self, clean_queue, mock_user):
+        """allow_lead=False should refuse the empty lead slot."""
+        with patch.object(clean_queue, '_write_persistent_state'):
+            result = clean_queue.try_claim_lead(mock_user, allow_lead=False)
+        
+        assert result == (False, None)
+        assert clean_queue.stream_queue == []
+    
+    def test_allow_lead_ignored_when_queue_not_empty(self, clean_queue, mock_user_factory):
+        """Blocking only applies to the lead slot; users can still queue behind a lead."""
+        lead, follower = mock_user_factory(1), mock_user_factory(2)
+        with patch.object(clean_queue, '_write_persistent_state'):
+            clean_queue.try_claim_lead(lead)
+            result = clean_queue.try_claim_lead(follower, allow_lead=False)
+            repeat = clean_queue.try_claim_lead(follower)
+        
+        assert result == (True, "TEST_KEY_1")
+        assert repeat == (False, "TEST_KEY_1")
+        assert len(clean_queue.stream_queue) == 2
+
+
+@pytest.mark.unit
+class TestRemoveClientUnlessLead:
+    """Test the combined lead check and removal used by on_unpublish."""
+    
+    def test_lead_is_kept(self, clean_queue, mock_user_factory):
+        """The lead is reported and left in the queue for switch_stream to handle."""
+        lead, follower = mock_user_factory(1), mock_user_factory(2)
+        clean_queue.stream_queue.extend([lead, follower])
+        
+        with patch.object(clean_queue, '_write_persistent_state') as write:
+            assert clean_queue.remove_client_unless_lead(lead.stream_key) is True
+        
+        assert clean_queue.stream_queue == [lead, follower]
+        write.assert_not_called()
+    
+    def test_non_lead_is_removed(self, clean_queue, mock_user_factory):
+        """A queued non-lead is removed and the queue persisted."""
+        lead, follower = mock_user_factory(1), mock_user_factory(2)
+        clean_queue.stream_queue.extend([lead, follower])
+        
+        with patch.object(clean_queue, '_write_persistent_state') as write:
+            assert clean_queue.remove_client_unless_lead(follower.stream_key) is False
+        
+        assert clean_queue.stream_queue == [lead]
+        write.assert_called_once()
+    
+    def test_unknown_key(self, clean_queue, mock_user):
+        """Unknown keys are neither lead nor removed."""
+        clean_queue.stream_queue.append(mock_user)
+        
+        with patch.object(clean_queue, '_write_persistent_state'):
+            assert clean_queue.remove_client_unless_lead("UNKNOWN_KEY") is False
+        
+        assert clean_queue.stream_queue == [mock_user]
+
+
 @pytest.mark.unit
 class TestUnqueueClientStream:
     """Test unqueue_client_stream method."""
@@ -0,0 +1,69 @@
+"""Unit tests for TimeManager class."""
+import pytest
+from unittest.mock import patch
+
+from app.core import time_manager
+from app.core.time_manager import TimeManager
+
+
+@pytest.fixture(autouse=True)
+def restore_swap_interval():
+    """swap_interval is module-global, so put it back after each test."""
+    original = time_manager.swap_interval
+    yield
+    time_manager.swap_interval = original
+
+
+@pytest.mark.unit
+class TestSwapDeadline:
+    """Test the cached swap deadline."""
+
+    def test_elapsed_after_interval(self):
+        with patch('app.core.time_manager.time.monotonic', return_value=1000.0):
+            tm = TimeManager()
+            tm.modify_swap_interval(60)
+
+        with patch('app.core.time_manager.time.monotonic', return_value=1059.0):
+            assert not tm.has_swap_interval_elapsed()
+            assert tm.get_remaining_time() == pytest.approx(1.0)
+        with patch('app.core.time_manager.time.monotonic', return_value=1060.0):
+            assert tm.has_swap_interval_elapsed()
+            assert tm.get_remaining_time() == 0
+
+    def test_reset_time_moves_deadline(self):
+        with patch('app.core.time_manager.time.monotonic', return_value=1000.0):
+            tm = TimeManager()
+            tm.modify_swap_interval(60)
+        with patch('app.core.time_manager.time.monotonic', return_value=1050.0):
+            tm.modify_swap_interval(60, reset_time=True)
+
+        with patch('app.core.time_manager.time.monotonic', return_value=1100.0):
+            assert not tm.has_swap_interval_elapsed()
+            assert tm.get_remaining_time() == pytest.approx(10.0)
+
+    def test_interval_changed_by_another_instance(self):
+        """The interval is shared, so a change made through another instance must move this deadline too."""
+        with patch('app.core.time_manager.time.monotonic', return_value=1000.0):
+            tm = TimeManager()
+            tm.modify_swap_interval(60)
+            TimeManager().modify_swap_interval(120)
+
+        with patch('app.core.time_manager.time.monotonic', return_value=1100.0):
+            assert not tm.has_swap_interval_elapsed()
+            assert tm.get_remaining_time() == pytest.approx(20.0)
+
+    def test_invalid_interval_is_ignored(self):
+        with patch('app.core.time_manager.time.monotonic', return_value=1000.0):
+            tm = TimeManager()
+            tm.modify_swap_interval(60)
+            tm.modify_swap_interval("not a number")
+
+        assert tm.get_swap_interval() == 60
+
+    @pytest.mark.parametrize("interval", [0, -30, "-5"])
+    def test_non_positive_interval_is_ignored(self, interval):
+        tm = TimeManager()
+        tm.modify_swap_interval(60)
+        tm.modify_swap_interval(interval)
+
+        assert tm.get_swap_interval() == 60
@@ -0,0 +1,112 @@
+"""Unit tests for stream key validation caching."""
+import pytest
+from unittest.mock import Mock, patch
+
+from app.db import validation
+from app.db.validation import ensure_valid_user, invalidate
+
+
+@pytest.fixture(autouse=True)
+def empty_user_cache():
+    """Start every test with an empty lookup cache."""
+    validation.clear_user_cache()
+    yield
+    validation.clear_user_cache()
+
+
+@pytest.mark.unit
+class TestEnsureValidUserCache:
+    """Test the short-TTL cache in front of the stream key lookup."""
+
+    def test_repeated_lookup_hits_db_once(self, mock_user):
+        """A valid stream key should only be looked up once within the TTL."""
+        with patch('app.db.validation.get_user_by_stream_key', return_value=mock_user) as lookup:
+            assert ensure_valid_user(mock_user.stream_key) is mock_user
+            assert ensure_valid_user(mock_user.stream_key) is mock_user
+
+        assert lookup.call_count == 1
+
+    def test_invalidate_forces_new_lookup(self, mock_user):
+        """Invalidating a stream key should make the next call hit the DB again."""
+        with patch('app.db.validation.get_user_by_stream_key', return_value=mock_user) as lookup:
+            ensure_valid_user(mock_user.stream_key)
+            invalidate(mock_user.stream_key)
+            ensure_valid_user(mock_user.stream_key)
+
+        assert lookup.call_count == 2
+
+    def test_unknown_key_expires_quickly(self, mock_user):
+        """Misses use the shorter negative TTL so new users aren't locked out."""
+        with patch('app.db.validation.get_user_by_stream_key', return_value=None) as lookup:
+            with patch('app.db.validation.time.monotonic', return_value=100.0):
+                assert ensure_valid_user("UNKNOWN_KEY") is None
+                assert ensure_valid_user("UNKNOWN_KEY") is None
+            with patch('app.db.validation.time.monotonic', return_value=100.0 + validation.USER_CACHE_NEGATIVE_TTL + 1):
+                assert ensure_valid_user("UNKNOWN_KEY") is None
+
+        assert lookup.call_count == 2
+
+    def test_db_errors_are_not_cached(self, mock_user):
+        """A failed lookup should not be remembered as an invalid key."""
+        with patch('app.db.validation.get_user_by_stream_key', side_effect=[Exception("db down"), mock_user]):
+            assert ensure_valid_user(mock_user.stream_key) is None
+            assert ensure_valid_user(mock_user.stream_key) is mock_user
+
+    def test_stream_keys_are_not_stored_raw(self, mock_user):
+        """Cache keys should be hashes, not the bearer-token stream keys themselves."""
+        with patch('app.db.validation.get_user_by_stream_key', return_value=mock_user):
+            ensure_valid_user(mock_user.stream_key)
+
+        assert mock_user.stream_key not in validation._user_cache
+        assert len(validation._user_cache) == 1
+
+    def test_trailing_newline_is_rejected(self):
+        """The stream key pattern must match the whole string, including a trailing newline."""
+        with patch('app.db.validation.get_user_by_stream_key') as lookup:
+            with pytest.raises(Exception):
+                ensure_valid_user("TEST_KEY\n")
+
+        lookup.assert_not_called()
+
+
+@pytest.mark.unit
+class TestIsValidStreamKey:
+    """Test the stream key character check."""
+
+    @pytest.mark.parametrize("stream_key", ["ABC123XYZ9", "dj_name-2", "-", "_"])
+    def test_accepts_allowed_characters(self, stream_key):
+        assert validation.is_valid_stream_key(stream_key)
+
+    @pytest.mark.parametrize("stream_key", ["KEY 1", "KEY/1", "KEY\n", "KÉY1", "КЛЮЧ1", "KEY١"])
+    def test_rejects_everything_else(self, stream_key):
+        """Unicode letters and digits pass str.isalnum, so the ASCII check must gate it."""
+        assert not validation.is_valid_stream_key(stream_key)
+
+
+@pytest.mark.unit
+class TestEnsureValidUserSession:
+    """Test how ensure_valid_user gets its DB session."""
+
+    def test_uses_caller_session(self, mock_user):
+        db = Mock()
+        with patch('app.db.validation.get_db') as get_db:
+            with patch('app.db.validation.get_user_by_stream_key', return_value=mock_user) as lookup:
+                assert ensure_valid_user(mock_user.stream_key, db=db) is mock_user
+
+        get_db.assert_not_called()
+        assert lookup.call_args.kwargs['db'] is db
+
+    def test_closes_session_it_opened(self, mock_user):
+        closed = []
+
+        def fake_get_db():
+            try:
+                yield Mock()
+            finally:
+                closed.append(True)
+
+        with patch('app.db.validation.get_db', side_effect=fake_get_db):
+            with patch('app.db.validation.get_user_by_stream_key', return_value=mock_user):
+                ensure_valid_user(mock_user.stream_key)
+
+        assert closed == [True]